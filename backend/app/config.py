@@ -4,7 +4,10 @@ Extracted from old backend.py - environment variables and settings
 """
 
 import os
-from typing import Optional
+import functools
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+from pydantic import field_serializer
 from pydantic_settings import BaseSettings
 
 
@@ -16,10 +19,15 @@ class Settings(BaseSettings):
     
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./data/soil_history.db"
+    SQL_ECHO: bool = False  # Log every SQL statement (development only)
     
     # Environment
     ENVIRONMENT: str = "development"
     
+    # Server Settings (used by `python -m app.main`)
+    # WORKERS defaults to one per CPU core in production
+    WORKERS: Optional[int] = None
+    
     # API Settings
     API_V1_PREFIX: str = "/api"
     PROJECT_NAME: str = "NutriSense API"
@@ -28,9 +36,9 @@ class Settings(BaseSettings):
     # CORS Settings
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:5173,http://127.0.0.1:3000,http://127.0.0.1:5173"
     
-    @property
+    @functools.cached_property
     def cors_origins_list(self) -> list[str]:
-        """Parse CORS origins from comma-separated string"""
+        """Parse CORS origins from comma-separated string (parsed once)"""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
     # AI Model Configuration
@@ -38,9 +46,12 @@ class Settings(BaseSettings):
     AI_TEMPERATURE: float = 0.3
     AI_MAX_TOKENS: int = 600
     AI_TIMEOUT: int = 30
+    AI_MAX_CONCURRENCY: int = 8  # Concurrent Groq calls per worker
+    AI_CACHE_TTL: int = 3600  # Seconds to reuse identical AI responses (0 disables)
     
     # Optimal Parameter Ranges (from old app.py interpretation logic)
-    OPTIMAL_RANGES: dict = {
+    # Read-only so shared settings cannot be mutated at runtime
+    OPTIMAL_RANGES: Mapping[str, Mapping[str, Any]] = {
         "pH": {"min": 6.5, "max": 7.5, "unit": "pH"},
         "EC": {"min": 0.0, "max": 0.8, "unit": "dS/m"},
         "Moisture": {"min": 25.0, "max": 40.0, "unit": "%"},
@@ -51,20 +62,48 @@ class Settings(BaseSettings):
         "Temperature": {"min": 10.0, "max": 30.0, "unit": "°C"},
     }
     
+    def model_post_init(self, __context: Any) -> None:
+        """Freeze OPTIMAL_RANGES after env parsing"""
+        self.OPTIMAL_RANGES = MappingProxyType(
+            {name: MappingProxyType(dict(bounds)) for name, bounds in self.OPTIMAL_RANGES.items()}
+        )
+    
+    def __deepcopy__(self, memo: Optional[dict] = None) -> "Settings":
+        """Deep copies share the frozen ranges; they are immutable and mappingproxy can't be copied"""
+        memo = {} if memo is None else memo
+        memo[id(self.OPTIMAL_RANGES)] = self.OPTIMAL_RANGES
+        for bounds in self.OPTIMAL_RANGES.values():
+            memo[id(bounds)] = bounds
+        return super().__deepcopy__(memo)
+    
+    @field_serializer("OPTIMAL_RANGES")
+    def serialize_optimal_ranges(self, ranges: Mapping[str, Mapping[str, Any]]) -> dict:
+        """Dump frozen ranges as plain dicts"""
+        return {name: dict(bounds) for name, bounds in ranges.items()}
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
 
 
-# Global settings instance
-settings = Settings()
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Return the shared Settings instance
+    Env vars and .env are parsed once; call get_settings.cache_clear() to reload
+    """
+    return Settings()
+
+
+# Global settings instance (kept for backward compatibility)
+settings = get_settings()
 
 
 def is_production_environment() -> bool:
     """Check if running in production environment"""
-    return settings.ENVIRONMENT.lower() == "production"
+    return get_settings().ENVIRONMENT.lower() == "production"
 
 
 def get_groq_api_key() -> Optional[str]:
     """Get Groq API key from settings or environment"""
-    return settings.GROQ_API_KEY or os.getenv("GROQ_API_KEY")
+    return get_settings().GROQ_API_KEY or os.getenv("GROQ_API_KEY")
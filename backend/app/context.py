@@ -0,0 +1,43 @@
+"""
+Request Context
+Per-request values shared across handlers, services and models
+"""
+
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Optional
+
+
+_request_time: ContextVar[Optional[datetime]] = ContextVar("request_time", default=None)
+
+
+def get_request_time() -> datetime:
+    """
+    Get the timestamp bound to the current request
+    Falls back to datetime.now() outside a request (scripts, tests)
+    """
+    now = _request_time.get()
+    return now if now is not None else datetime.now()
+
+
+class RequestTimeMiddleware:
+    """
+    ASGI middleware that reads the clock once per request
+    The value is exposed as request.state.now and through get_request_time()
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        now = datetime.now()
+        scope.setdefault("state", {})["now"] = now
+        token = _request_time.set(now)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_time.reset(token)
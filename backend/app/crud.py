@@ -3,22 +3,124 @@ Database CRUD Operations
 Extracted from old backend.py - save_record() and load_history() functions
 """
 
-import json
-import hashlib
-from typing import List, Optional
+import base64
+import time
+import orjson
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import bindparam, case, column, delete, desc, func, null, select, table, text, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
-from .database import SoilRecordDB
-from .models import SoilData, SoilRecord
+from .database import SoilRecordDB, SOIL_PARAMETERS, LOCATION_FTS_ENABLED, canonical_json, hash_payload
+from .models import SoilData, SoilRecord, SoilRecordSummary
 from .services.analysis import calculate_health_score
+from .context import get_request_time
 
 
 def create_data_hash(soil_data: dict) -> str:
-    """Create MD5 hash of soil data for deduplication"""
-    data_str = json.dumps(soil_data, sort_keys=True)
-    return hashlib.md5(data_str.encode()).hexdigest()
+    """
+    Create BLAKE2b fingerprint of soil data for deduplication
+    
+    The hash is not security-sensitive; a 16-byte digest keeps the
+    32-character hex format of the existing data_hash column.
+    """
+    return hash_payload(canonical_json(soil_data))
+
+
+# FTS5 index over soil_records.location (see database.init_location_search)
+_location_fts = table("soil_records_fts", column("rowid"))
+
+
+def _location_filter(location: str):
+    """
+    Build the case-insensitive partial-match filter for location
+    Uses the FTS5 trigram index when available; trigrams need at least
+    3 characters, so shorter queries fall back to lower() LIKE '%...%'.
+    A leading wildcard can't seek any index, so that fallback walks
+    ix_soil_records_ts_id newest first and tests each row until the page
+    is full; ix_soil_records_loc_ts only serves exact lower(location)
+    matches.
+    """
+    if LOCATION_FTS_ENABLED and len(location) >= 3:
+        phrase = '"' + location.replace('"', '""') + '"'
+        matches = select(_location_fts.c.rowid).where(
+            text("soil_records_fts MATCH :location_query").bindparams(location_query=phrase)
+        )
+        return SoilRecordDB.id.in_(matches)
+    
+    return func.lower(SoilRecordDB.location).like(f"%{location.lower()}%")
+
+
+# Statements used on every call are built once at import time; values are
+# passed as bind parameters so SQLAlchemy's compiled cache is hit directly
+_INSERT_RECORD = (
+    sqlite_insert(SoilRecordDB)
+    .on_conflict_do_nothing(index_elements=["data_hash"])
+    .returning(SoilRecordDB.id)
+)
+
+_RECORD_COLUMNS = (
+    SoilRecordDB.id,
+    SoilRecordDB.data_hash,
+    SoilRecordDB.soil_data,
+    SoilRecordDB.timestamp,
+    SoilRecordDB.summary,
+    SoilRecordDB.location,
+    SoilRecordDB.health_score,
+    *(getattr(SoilRecordDB, name) for name in SOIL_PARAMETERS)
+)
+
+_SUMMARY_COLUMNS = (
+    SoilRecordDB.id,
+    SoilRecordDB.timestamp,
+    SoilRecordDB.location,
+    SoilRecordDB.health_score
+)
+
+# Export row layout; soil_data is only selected for rows predating the
+# typed parameter columns
+_EXPORT_COLUMNS = (
+    SoilRecordDB.id,
+    SoilRecordDB.timestamp,
+    SoilRecordDB.location,
+    SoilRecordDB.health_score,
+    *(getattr(SoilRecordDB, name) for name in SOIL_PARAMETERS),
+    SoilRecordDB.summary,
+    case((SoilRecordDB.pH.is_(None), SoilRecordDB.soil_data), else_=null()).label("legacy_json")
+)
+
+_SELECT_RECORD_BY_ID = select(*_RECORD_COLUMNS).where(
+    SoilRecordDB.id == bindparam("record_id")
+)
+
+
+def _row_to_record(row) -> Optional[SoilRecord]:
+    """
+    Build a SoilRecord from a _RECORD_COLUMNS row
+    
+    soil_data comes from the typed columns; the JSON text is only parsed
+    for legacy rows that predate them. Returns None if that JSON is invalid.
+    """
+    if row["pH"] is not None:
+        soil_dict = {name: row[name] for name in SOIL_PARAMETERS}
+    else:
+        try:
+            soil_dict = orjson.loads(row["soil_data"])
+        except orjson.JSONDecodeError:
+            return None
+    
+    # Values come from our own table, so validation is skipped
+    return SoilRecord.model_construct(
+        id=row["id"],
+        data_hash=row["data_hash"],
+        soil_data=soil_dict,
+        timestamp=row["timestamp"],
+        summary=row["summary"],
+        location=row["location"],
+        health_score=row["health_score"]
+    )
 
 
 def save_soil_record(
@@ -41,101 +143,155 @@ def save_soil_record(
         Created SoilRecord or None if duplicate
     """
     try:
-        # Convert to dict and create hash
+        # Serialize once and reuse the bytes for the hash and the stored JSON
         soil_dict = soil_data.model_dump()
-        data_hash = create_data_hash(soil_dict)
+        payload = canonical_json(soil_dict)
+        data_hash = hash_payload(payload)
         
-        # Check if record already exists
-        existing = db.query(SoilRecordDB).filter(
-            SoilRecordDB.data_hash == data_hash
-        ).first()
+        # Calculate health score
+        health_score = calculate_health_score(soil_data)
+        timestamp = get_request_time()
+        
+        # Single INSERT; the unique data_hash index handles deduplication
+        # and RETURNING hands back the new id without a reload
+        record_id = db.execute(_INSERT_RECORD, {
+            "data_hash": data_hash,
+            "soil_data": payload.decode(),
+            "timestamp": timestamp,
+            "summary": summary,
+            "location": location,
+            "health_score": health_score,
+            **soil_dict
+        }).scalar_one_or_none()
+        db.commit()
         
-        if existing:
+        if record_id is None:
             # Record already exists, return None
             return None
         
-        # Calculate health score
-        health_score = calculate_health_score(soil_data)
+        _count_cache.clear()
         
-        # Create new record
-        db_record = SoilRecordDB(
+        # Convert to Pydantic model (values were just written by us)
+        return SoilRecord.model_construct(
+            id=record_id,
             data_hash=data_hash,
-            soil_data=json.dumps(soil_dict),
-            timestamp=datetime.now(),
+            soil_data=soil_dict,
+            timestamp=timestamp,
             summary=summary,
             location=location,
             health_score=health_score
         )
         
-        db.add(db_record)
-        db.commit()
-        db.refresh(db_record)
-        
-        # Convert to Pydantic model
-        return SoilRecord(
-            id=db_record.id,
-            data_hash=db_record.data_hash,
-            soil_data=soil_dict,
-            timestamp=db_record.timestamp,
-            summary=db_record.summary,
-            location=db_record.location,
-            health_score=db_record.health_score
-        )
-        
     except Exception as e:
         db.rollback()
         raise e
 
 
-def get_soil_records(
-    db: Session,
+def encode_history_cursor(timestamp: datetime, record_id: int) -> str:
+    """
+    Build the opaque keyset cursor for the page after this record
+    
+    The cursor carries the record's (timestamp, id) itself, so it stays
+    valid if that record is deleted before the next page is requested.
+    """
+    raw = f"{timestamp.isoformat()}|{record_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Parse a cursor from encode_history_cursor()
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, record_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(record_id)
+    except Exception:
+        raise ValueError(f"Invalid history cursor: {cursor!r}")
+
+
+def _history_page(
+    columns,
+    location: Optional[str],
+    limit: int,
+    offset: int,
+    after: Optional[Tuple[datetime, int]]
+):
+    """
+    Build the SELECT for one history page, newest first
+    
+    With after, uses keyset pagination: WHERE (timestamp, id) < after.
+    Otherwise uses a deferred join: page over IDs only in the
+    (timestamp, id) index, then fetch the selected columns for that page.
+    """
+    order = (desc(SoilRecordDB.timestamp), desc(SoilRecordDB.id))
+    
+    if after is not None:
+        stmt = select(*columns).where(
+            tuple_(SoilRecordDB.timestamp, SoilRecordDB.id) < tuple_(*after)
+        )
+        
+        # Apply location filter if provided
+        if location:
+            stmt = stmt.where(_location_filter(location))
+        
+        return stmt.order_by(*order).limit(limit)
+    
+    page = select(SoilRecordDB.id)
+    
+    # Apply location filter if provided
+    if location:
+        page = page.where(_location_filter(location))
+    
+    page = page.order_by(*order).limit(limit).offset(offset).subquery()
+    return (
+        select(*columns)
+        .select_from(SoilRecordDB)
+        .join(page, SoilRecordDB.id == page.c.id)
+        .order_by(*order)
+    )
+
+
+async def get_soil_records(
+    db: AsyncSession,
     location: Optional[str] = None,
     limit: int = 20,
-    offset: int = 0
+    offset: int = 0,
+    after: Optional[Tuple[datetime, int]] = None
 ) -> List[SoilRecord]:
     """
     Retrieve soil analysis history
     Original logic from old backend.py load_history() function (lines 680-710)
     
+    Pass the (timestamp, id) of the last record of the previous page as
+    after for keyset pagination, which stays fast at any depth. offset is kept for
+    existing clients and uses a deferred join, so skipped rows are only
+    walked in the (timestamp, id) index.
+    
     Args:
         db: Database session
         location: Optional location filter
         limit: Maximum number of records to return
-        offset: Number of records to skip
+        offset: Number of records to skip (ignored when after is given)
+        after: Keyset cursor, the (timestamp, id) of the last record of the
+            previous page (exclusive); see decode_history_cursor()
         
     Returns:
         List of SoilRecord objects
     """
     try:
-        query = db.query(SoilRecordDB).order_by(desc(SoilRecordDB.timestamp))
-        
-        # Apply location filter if provided
-        if location:
-            query = query.filter(SoilRecordDB.location.ilike(f"%{location}%"))
-        
-        # Apply pagination
-        query = query.limit(limit).offset(offset)
+        stmt = _history_page(_RECORD_COLUMNS, location, limit, offset, after)
         
-        # Execute query
-        db_records = query.all()
-        
-        # Convert to Pydantic models
+        # Convert rows straight to Pydantic models, skipping records with
+        # invalid JSON
         records = []
-        for db_record in db_records:
-            try:
-                soil_dict = json.loads(db_record.soil_data)
-                records.append(SoilRecord(
-                    id=db_record.id,
-                    data_hash=db_record.data_hash,
-                    soil_data=soil_dict,
-                    timestamp=db_record.timestamp,
-                    summary=db_record.summary,
-                    location=db_record.location,
-                    health_score=db_record.health_score
-                ))
-            except json.JSONDecodeError:
-                # Skip records with invalid JSON
-                continue
+        for row in (await db.execute(stmt)).mappings():
+            record = _row_to_record(row)
+            if record is not None:
+                records.append(record)
         
         return records
         
@@ -143,7 +299,91 @@ def get_soil_records(
         raise e
 
 
-def get_soil_record_by_id(db: Session, record_id: int) -> Optional[SoilRecord]:
+async def get_soil_record_summaries(
+    db: AsyncSession,
+    location: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+    after: Optional[Tuple[datetime, int]] = None
+) -> List[SoilRecordSummary]:
+    """
+    Retrieve a history page without soil_data or the AI summary
+    
+    Selects only the four listed columns, so nothing is parsed or
+    validated per row beyond building the summary objects.
+    
+    Args:
+        db: Database session
+        location: Optional location filter
+        limit: Maximum number of records to return
+        offset: Number of records to skip (ignored when after is given)
+        after: Keyset cursor, the (timestamp, id) of the last record of the
+            previous page (exclusive); see decode_history_cursor()
+        
+    Returns:
+        List of SoilRecordSummary objects
+    """
+    stmt = _history_page(_SUMMARY_COLUMNS, location, limit, offset, after)
+    
+    return [
+        SoilRecordSummary.model_construct(**row)
+        for row in (await db.execute(stmt)).mappings()
+    ]
+
+
+async def get_soil_records_for_export(
+    db: AsyncSession,
+    location: Optional[str] = None,
+    limit: int = 1000,
+    chunk_size: int = 200
+) -> AsyncIterator[Tuple]:
+    """
+    Stream export rows, newest first
+    Used by the CSV export so rows are fetched in chunks rather than all at once
+    
+    Only the exported columns are selected, and rows are yielded as plain
+    tuples with no model construction. The soil_data JSON is only fetched
+    for legacy rows without the typed parameter columns.
+    
+    The session's connection stays checked out until the iterator is
+    exhausted or the session is closed.
+    
+    Args:
+        db: Database session
+        location: Optional location filter
+        limit: Maximum number of records to yield
+        chunk_size: Rows fetched from the driver per batch
+        
+    Yields:
+        (id, timestamp, location, health_score, *SOIL_PARAMETERS values, summary)
+        tuples (legacy records with invalid JSON are skipped)
+    """
+    stmt = (
+        select(*_EXPORT_COLUMNS)
+        .order_by(desc(SoilRecordDB.timestamp), desc(SoilRecordDB.id))
+        .limit(limit)
+        .execution_options(yield_per=chunk_size)
+    )
+    
+    if location:
+        stmt = stmt.where(_location_filter(location))
+    
+    result = await db.stream(stmt)
+    async for row in result:
+        legacy_json = row[-1]
+        if legacy_json is None:
+            yield tuple(row[:-1])
+            continue
+        
+        try:
+            soil_dict = orjson.loads(legacy_json)
+        except orjson.JSONDecodeError:
+            continue
+        
+        yield (*row[:4], *[soil_dict.get(name, "") for name in SOIL_PARAMETERS], row[-2])
+
+
+async def get_soil_record_by_id(db: AsyncSession, record_id: int) -> Optional[SoilRecord]:
     """
     Get a single soil record by ID
     
@@ -155,30 +395,20 @@ def get_soil_record_by_id(db: Session, record_id: int) -> Optional[SoilRecord]:
         SoilRecord or None if not found
     """
     try:
-        db_record = db.query(SoilRecordDB).filter(
-            SoilRecordDB.id == record_id
-        ).first()
+        row = (await db.execute(
+            _SELECT_RECORD_BY_ID, {"record_id": record_id}
+        )).mappings().first()
         
-        if not db_record:
+        if not row:
             return None
         
-        soil_dict = json.loads(db_record.soil_data)
-        
-        return SoilRecord(
-            id=db_record.id,
-            data_hash=db_record.data_hash,
-            soil_data=soil_dict,
-            timestamp=db_record.timestamp,
-            summary=db_record.summary,
-            location=db_record.location,
-            health_score=db_record.health_score
-        )
+        return _row_to_record(row)
         
     except Exception as e:
         raise e
 
 
-def delete_soil_record(db: Session, record_id: int) -> bool:
+async def delete_soil_record(db: AsyncSession, record_id: int) -> bool:
     """
     Delete a soil record by ID
     
@@ -190,23 +420,23 @@ def delete_soil_record(db: Session, record_id: int) -> bool:
         True if deleted, False if not found
     """
     try:
-        db_record = db.query(SoilRecordDB).filter(
-            SoilRecordDB.id == record_id
-        ).first()
+        result = await db.execute(
+            delete(SoilRecordDB).where(SoilRecordDB.id == record_id)
+        )
+        await db.commit()
         
-        if not db_record:
+        if result.rowcount == 0:
             return False
         
-        db.delete(db_record)
-        db.commit()
+        _count_cache.clear()
         return True
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise e
 
 
-def get_record_count(db: Session, location: Optional[str] = None) -> int:
+async def get_record_count(db: AsyncSession, location: Optional[str] = None) -> int:
     """
     Get total count of records
     
@@ -218,12 +448,51 @@ def get_record_count(db: Session, location: Optional[str] = None) -> int:
         Total count of records
     """
     try:
-        query = db.query(SoilRecordDB)
+        stmt = select(func.count()).select_from(SoilRecordDB)
         
         if location:
-            query = query.filter(SoilRecordDB.location.ilike(f"%{location}%"))
+            stmt = stmt.where(_location_filter(location))
         
-        return query.count()
+        return (await db.execute(stmt)).scalar_one()
         
     except Exception as e:
         raise e
+
+
+# Counts are reused for a short window, keyed by lowercased location.
+# Writes in this process clear the cache; writes from other workers show
+# up once the entry expires.
+COUNT_CACHE_TTL = 30.0
+COUNT_CACHE_MAX_ENTRIES = 1024
+_count_cache: Dict[Optional[str], Tuple[float, int]] = {}
+
+
+async def get_cached_record_count(
+    db: AsyncSession,
+    location: Optional[str] = None
+) -> Tuple[int, bool]:
+    """
+    Get the record count, served from a TTL cache when possible
+    
+    Args:
+        db: Database session
+        location: Optional location filter
+        
+    Returns:
+        Tuple of (count, estimated); estimated is True when the count came
+        from the cache and may be up to COUNT_CACHE_TTL seconds old
+    """
+    key = location.lower() if location else None
+    now = time.monotonic()
+    
+    cached = _count_cache.get(key)
+    if cached is not None and now - cached[0] < COUNT_CACHE_TTL:
+        return cached[1], True
+    
+    count = await get_record_count(db=db, location=location)
+    
+    if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+        _count_cache.clear()
+    _count_cache[key] = (now, count)
+    
+    return count, False
@@ -3,14 +3,19 @@ Database Configuration and Session Management
 Extracted from old backend.py - SQLite setup with SQLAlchemy
 """
 
+import hashlib
+import json
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Text
+import orjson
+from sqlalchemy import create_engine, event, func, inspect, text, Column, Integer, String, Float, DateTime, Text, Index
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from datetime import datetime
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
-from .config import settings
+from .config import get_settings
 
 
 # Create data directory if it doesn't exist
@@ -18,21 +23,58 @@ db_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
 os.makedirs(db_dir, exist_ok=True)
 
 # Database URL - convert relative path to absolute
-if settings.DATABASE_URL.startswith("sqlite:///./"):
-    db_path = settings.DATABASE_URL.replace("sqlite:///./", "")
+configured_url = get_settings().DATABASE_URL
+if configured_url.startswith("sqlite:///./"):
+    db_path = configured_url.replace("sqlite:///./", "")
     absolute_db_path = os.path.join(db_dir, os.path.basename(db_path))
     DATABASE_URL = f"sqlite:///{absolute_db_path}"
 else:
-    DATABASE_URL = settings.DATABASE_URL
+    DATABASE_URL = configured_url
+
+# Async driver for request handlers (sqlite -> aiosqlite)
+if DATABASE_URL.startswith("sqlite:"):
+    ASYNC_DATABASE_URL = DATABASE_URL.replace("sqlite:", "sqlite+aiosqlite:", 1)
+else:
+    ASYNC_DATABASE_URL = DATABASE_URL
 
 # Create engine
+# The sync engine handles schema setup and background writes; request
+# handlers use the async engine so queries don't hold a worker thread
 engine = create_engine(
     DATABASE_URL,
+    echo=get_settings().SQL_ECHO,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
 )
+async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=get_settings().SQL_ECHO)
+
+
+if "sqlite" in DATABASE_URL:
+    @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """
+        Tune every new SQLite connection
+        WAL lets history reads run alongside writes, and synchronous=NORMAL
+        drops the per-commit fsync to checkpoint time.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
+
+# SoilData fields mirrored into typed columns on soil_records
+SOIL_PARAMETERS = ("pH", "EC", "Moisture", "Nitrogen", "Phosphorus", "Potassium", "Microbial", "Temperature")
 
-# Session factory
+# PRAGMA user_version once stored data_hash values use hash_payload()
+DATA_HASH_VERSION = 1
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
 
 # Base class for models
 Base = declarative_base()
@@ -52,6 +94,24 @@ class SoilRecordDB(Base):
     summary = Column(Text, nullable=True)
     location = Column(String, nullable=True)
     health_score = Column(Float, nullable=True)
+    
+    # Typed copies of the soil_data values, so reads skip JSON parsing.
+    # Nullable because rows written by the old Streamlit app lack them.
+    pH = Column(Float, nullable=True)
+    EC = Column(Float, nullable=True)
+    Moisture = Column(Float, nullable=True)
+    Nitrogen = Column(Float, nullable=True)
+    Phosphorus = Column(Float, nullable=True)
+    Potassium = Column(Float, nullable=True)
+    Microbial = Column(Float, nullable=True)
+    Temperature = Column(Float, nullable=True)
+    
+    # History queries order by newest first. The location index serves exact
+    # lower(location) matches; partial matches use FTS5 or scan ix_soil_records_ts_id
+    __table_args__ = (
+        Index("ix_soil_records_ts_id", timestamp.desc(), id.desc()),
+        Index("ix_soil_records_loc_ts", func.lower(location), timestamp.desc(), id.desc()),
+    )
 
 
 def init_database():
@@ -60,6 +120,127 @@ def init_database():
     Original logic from old backend.py init_db() function
     """
     Base.metadata.create_all(bind=engine)
+    
+    # create_all() skips indexes on tables that already exist; IF NOT EXISTS
+    # rather than checkfirst, since expression indexes can't be reflected
+    with engine.begin() as conn:
+        for index in SoilRecordDB.__table__.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+        
+        # Superseded by ix_soil_records_loc_ts
+        conn.execute(text("DROP INDEX IF EXISTS ix_soil_records_location_ts"))
+    
+    init_soil_columns()
+    init_data_hashes()
+
+
+def canonical_json(soil_data: dict) -> bytes:
+    """Serialize soil data with sorted keys; used for both hashing and storage"""
+    return orjson.dumps(soil_data, option=orjson.OPT_SORT_KEYS)
+
+
+def hash_payload(payload: bytes) -> str:
+    """Hash an already-serialized canonical payload"""
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def init_data_hashes():
+    """
+    Rehash records saved with the legacy MD5 data_hash
+    Without this, re-saving a legacy sample misses the unique index and
+    inserts a duplicate. Runs once per database (PRAGMA user_version).
+    """
+    if "sqlite" not in DATABASE_URL:
+        return
+    
+    with engine.begin() as conn:
+        if conn.exec_driver_sql("PRAGMA user_version").scalar() >= DATA_HASH_VERSION:
+            return
+        
+        updates = []
+        for record_id, soil_json in conn.execute(text("SELECT id, soil_data FROM soil_records")):
+            try:
+                soil = json.loads(soil_json)
+                soil_dict = {name: float(soil[name]) for name in SOIL_PARAMETERS}
+            except (TypeError, ValueError, KeyError):
+                continue  # unreadable payloads keep their old hash
+            updates.append({"id": record_id, "data_hash": hash_payload(canonical_json(soil_dict))})
+        
+        # OR IGNORE: a sample already re-saved under the new hash keeps both rows
+        if updates:
+            conn.execute(text("UPDATE OR IGNORE soil_records SET data_hash = :data_hash WHERE id = :id"), updates)
+        conn.exec_driver_sql(f"PRAGMA user_version = {DATA_HASH_VERSION}")
+
+
+def init_soil_columns():
+    """
+    Add the typed soil parameter columns to an existing soil_records table
+    and backfill them from the soil_data JSON
+    """
+    existing = {col["name"] for col in inspect(engine).get_columns("soil_records")}
+    missing = [name for name in SOIL_PARAMETERS if name not in existing]
+    
+    with engine.begin() as conn:
+        for name in missing:
+            conn.execute(text(f'ALTER TABLE soil_records ADD COLUMN "{name}" FLOAT'))
+        
+        if "sqlite" in DATABASE_URL:
+            assignments = ", ".join(
+                f'"{name}" = json_extract(soil_data, \'$.{name}\')' for name in SOIL_PARAMETERS
+            )
+            conn.execute(text(
+                f'UPDATE soil_records SET {assignments} '
+                f'WHERE "pH" IS NULL AND json_valid(soil_data)'
+            ))
+
+
+def init_location_search() -> bool:
+    """
+    Create the FTS5 trigram index used for location search
+    
+    The external-content table is kept in sync with soil_records by
+    triggers. Trigram tokens preserve the case-insensitive substring
+    semantics of the ILIKE filter for queries of 3+ characters.
+    
+    Returns:
+        True if FTS5 location search is available, False to fall back to ILIKE
+    """
+    if "sqlite" not in DATABASE_URL:
+        return False
+    
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'soil_records_fts'"
+            )).first()
+            if exists:
+                return True
+            
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE soil_records_fts USING fts5("
+                "location, content='soil_records', content_rowid='id', tokenize='trigram')"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER soil_records_fts_ai AFTER INSERT ON soil_records BEGIN "
+                "INSERT INTO soil_records_fts(rowid, location) VALUES (new.id, new.location); END"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER soil_records_fts_ad AFTER DELETE ON soil_records BEGIN "
+                "INSERT INTO soil_records_fts(soil_records_fts, rowid, location) "
+                "VALUES ('delete', old.id, old.location); END"
+            ))
+            conn.execute(text(
+                "CREATE TRIGGER soil_records_fts_au AFTER UPDATE OF location ON soil_records BEGIN "
+                "INSERT INTO soil_records_fts(soil_records_fts, rowid, location) "
+                "VALUES ('delete', old.id, old.location); "
+                "INSERT INTO soil_records_fts(rowid, location) VALUES (new.id, new.location); END"
+            ))
+            # Index rows that existed before the FTS table
+            conn.execute(text("INSERT INTO soil_records_fts(soil_records_fts) VALUES ('rebuild')"))
+        return True
+    except Exception:
+        # SQLite built without FTS5/trigram support
+        return False
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -74,5 +255,15 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for getting an async database session
+    Use with FastAPI Depends()
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 # Initialize database on import
 init_database()
+LOCATION_FTS_ENABLED = init_location_search()
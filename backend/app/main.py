@@ -3,22 +3,31 @@ FastAPI Main Application
 NutriSense - AI Soil Intelligence Platform Backend
 """
 
-from fastapi import FastAPI, HTTPException
+import os
+import time
+from typing import Optional, Tuple
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from datetime import datetime
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import text
 
-from .config import settings
+from .config import get_settings
+from .context import RequestTimeMiddleware
 from .routers import analyze_router, history_router
 
 
+settings = get_settings()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description="AI-powered soil analysis and recommendation API",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 
@@ -29,9 +38,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """
+    GZip that skips Server-Sent Events endpoints
+    The compressor buffers output, which would hold back streamed tokens.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/stream"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress larger responses (history pages, CSV export)
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=1024)
+
+
+# Read the clock once per request (request.state.now / get_request_time())
+app.add_middleware(RequestTimeMiddleware)
+
+
 # Include routers
 app.include_router(analyze_router, prefix=settings.API_V1_PREFIX)
 app.include_router(history_router, prefix=settings.API_V1_PREFIX)
@@ -39,13 +70,13 @@ app.include_router(history_router, prefix=settings.API_V1_PREFIX)
 
 # Root endpoint
 @app.get("/")
-async def root():
+async def root(request: Request):
     """API root endpoint with service information"""
     return {
         "service": settings.PROJECT_NAME,
         "version": settings.VERSION,
         "status": "online",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": request.state.now,
         "docs": "/docs",
         "endpoints": {
             "analysis": f"{settings.API_V1_PREFIX}/analyze",
@@ -54,26 +85,46 @@ async def root():
     }
 
 
-# Health check endpoint
-@app.get("/health")
-async def health_check():
-    """Health check endpoint for monitoring"""
+# Health probe results are reused for a short window to absorb probe storms
+HEALTH_CACHE_TTL = 10.0
+_health_cache: Optional[Tuple[float, Tuple[str, str]]] = None
+
+
+def _probe_services() -> Tuple[str, str]:
+    """Check database and AI service status, cached for HEALTH_CACHE_TTL seconds"""
+    global _health_cache
+    
+    now = time.monotonic()
+    if _health_cache is not None and now - _health_cache[0] < HEALTH_CACHE_TTL:
+        return _health_cache[1]
+    
     from .services.ai import get_groq_client
     from .database import engine
     
     # Check database connection
     db_status = "healthy"
     try:
-        engine.connect()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
     except Exception:
         db_status = "unhealthy"
     
     # Check AI service
     ai_status = "configured" if get_groq_client() else "not_configured"
     
+    _health_cache = (now, (db_status, ai_status))
+    return db_status, ai_status
+
+
+# Health check endpoint
+@app.get("/health")
+async def health_check(request: Request):
+    """Health check endpoint for monitoring"""
+    db_status, ai_status = _probe_services()
+    
     return {
         "status": "healthy" if db_status == "healthy" else "degraded",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": request.state.now,
         "services": {
             "database": db_status,
             "ai_service": ai_status
@@ -85,12 +136,12 @@ async def health_check():
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Handle unexpected exceptions"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "Internal server error",
             "detail": str(exc) if settings.ENVIRONMENT == "development" else "An unexpected error occurred",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": request.state.now
         }
     )
 
@@ -120,9 +171,17 @@ async def shutdown_event():
 
 if __name__ == "__main__":
     import uvicorn
+    
+    # Auto-reload needs a single process; otherwise scale out across cores
+    reload = settings.ENVIRONMENT == "development"
+    workers = 1 if reload else (settings.WORKERS or os.cpu_count() or 1)
+    
+    # loop/http stay "auto": uvloop and httptools are used when installed,
+    # and asyncio/h11 elsewhere (uvloop is not available on Windows)
     uvicorn.run(
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True if settings.ENVIRONMENT == "development" else False
+        reload=reload,
+        workers=workers
     )
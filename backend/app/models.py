@@ -5,70 +5,27 @@ Extracted from old backend.py - SoilData class with all validators
 
 from typing import Optional, Dict, Any
 from datetime import datetime
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field
+
+from .context import get_request_time
 
 
 class SoilData(BaseModel):
     """
     Soil analysis data model with validation
     Original from old backend.py lines 200-220
-    """
-    pH: float = Field(..., description="Soil pH level (0-14)")
-    EC: float = Field(..., description="Electrical Conductivity in dS/m")
-    Moisture: float = Field(..., description="Moisture content in %")
-    Nitrogen: float = Field(..., description="Available Nitrogen in mg/kg")
-    Phosphorus: float = Field(..., description="Available Phosphorus in mg/kg")
-    Potassium: float = Field(..., description="Available Potassium in mg/kg")
-    Microbial: float = Field(..., description="Microbial Activity Index (0-10)")
-    Temperature: float = Field(..., description="Soil Temperature in °C")
-    
-    @field_validator('pH')
-    @classmethod
-    def pH_range(cls, v: float) -> float:
-        """Validate pH is within valid range"""
-        if not 0 <= v <= 14:
-            raise ValueError('pH must be between 0 and 14')
-        return v
-    
-    @field_validator('EC')
-    @classmethod
-    def ec_range(cls, v: float) -> float:
-        """Validate EC is non-negative"""
-        if v < 0:
-            raise ValueError('EC cannot be negative')
-        return v
-    
-    @field_validator('Moisture')
-    @classmethod
-    def moisture_range(cls, v: float) -> float:
-        """Validate moisture is within valid range"""
-        if not 0 <= v <= 100:
-            raise ValueError('Moisture must be between 0 and 100%')
-        return v
     
-    @field_validator('Nitrogen', 'Phosphorus', 'Potassium')
-    @classmethod
-    def nutrient_range(cls, v: float) -> float:
-        """Validate nutrients are non-negative"""
-        if v < 0:
-            raise ValueError('Nutrient values cannot be negative')
-        return v
-    
-    @field_validator('Microbial')
-    @classmethod
-    def microbial_range(cls, v: float) -> float:
-        """Validate microbial index is within valid range"""
-        if not 0 <= v <= 10:
-            raise ValueError('Microbial index must be between 0 and 10')
-        return v
-    
-    @field_validator('Temperature')
-    @classmethod
-    def temperature_range(cls, v: float) -> float:
-        """Validate temperature is reasonable"""
-        if not -10 <= v <= 60:
-            raise ValueError('Temperature must be between -10 and 60°C')
-        return v
+    Bounds are declared as Field constraints so pydantic-core checks them
+    natively instead of calling a Python validator per field.
+    """
+    pH: float = Field(..., ge=0, le=14, description="Soil pH level (0-14)")
+    EC: float = Field(..., ge=0, description="Electrical Conductivity in dS/m")
+    Moisture: float = Field(..., ge=0, le=100, description="Moisture content in %")
+    Nitrogen: float = Field(..., ge=0, description="Available Nitrogen in mg/kg")
+    Phosphorus: float = Field(..., ge=0, description="Available Phosphorus in mg/kg")
+    Potassium: float = Field(..., ge=0, description="Available Potassium in mg/kg")
+    Microbial: float = Field(..., ge=0, le=10, description="Microbial Activity Index (0-10)")
+    Temperature: float = Field(..., ge=-10, le=60, description="Soil Temperature in °C")
 
 
 class ParameterInterpretation(BaseModel):
@@ -96,7 +53,12 @@ class AIRecommendation(BaseModel):
 
 
 class SoilRecord(BaseModel):
-    """Database record for soil analysis"""
+    """
+    Database record for soil analysis
+    
+    crud builds instances with model_construct() (no validation); only
+    use that path for values loaded from or just written to the database.
+    """
     id: Optional[int] = None
     data_hash: str
     soil_data: Dict[str, Any]
@@ -109,6 +71,17 @@ class SoilRecord(BaseModel):
         from_attributes = True
 
 
+class SoilRecordSummary(BaseModel):
+    """
+    Lightweight history list entry (no soil_data or AI summary)
+    Built with model_construct() by crud, like SoilRecord
+    """
+    id: int
+    timestamp: datetime
+    location: Optional[str] = None
+    health_score: float
+
+
 class AnalysisRequest(BaseModel):
     """Request model for soil analysis"""
     soil_data: SoilData
@@ -134,4 +107,4 @@ class ErrorResponse(BaseModel):
     """Standard error response"""
     error: str
     detail: Optional[str] = None
-    timestamp: datetime = Field(default_factory=datetime.now)
+    timestamp: datetime = Field(default_factory=get_request_time)
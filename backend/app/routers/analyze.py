@@ -3,11 +3,13 @@ Analysis Endpoints
 Soil analysis and AI recommendation endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from datetime import datetime
+from typing import Dict, List, Optional
 
-from ..database import get_db
+from ..database import get_db, SessionLocal
 from ..models import (
     SoilData,
     AnalysisRequest,
@@ -17,14 +19,67 @@ from ..models import (
     ErrorResponse
 )
 from ..services.analysis import analyze_soil_data
-from ..services.ai import generate_ai_recommendation
+from ..services.ai import (
+    generate_ai_recommendation,
+    generate_all_recommendations,
+    stream_ai_recommendation
+)
 from ..crud import save_soil_record
-from ..config import settings
+from ..config import get_settings
+from ..context import get_request_time
 
 
 router = APIRouter(prefix="/analyze", tags=["Analysis"])
 
 
+def _save_record_in_background(
+    soil_data: SoilData,
+    summary: Optional[str] = None,
+    location: Optional[str] = None
+) -> None:
+    """
+    Persist a record after the response has been sent
+    Uses its own session because request-scoped sessions are closed by then
+    """
+    db = SessionLocal()
+    try:
+        save_soil_record(db=db, soil_data=soil_data, summary=summary, location=location)
+    except Exception:
+        # Don't surface history failures to the client
+        pass
+    finally:
+        db.close()
+
+
+class _StreamedSummary:
+    """Text and outcome of one streamed summary, filled in by the event stream"""
+    
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.completed = False
+        self.failed = False
+
+
+def _save_streamed_summary(
+    soil_data: SoilData,
+    streamed: _StreamedSummary,
+    location: Optional[str] = None
+) -> None:
+    """
+    Save a streamed summary once all chunks have been sent
+    Skipped when the stream was cut short by a disconnect or ended in an
+    error message, so neither partial text nor errors are stored as summaries
+    """
+    if not streamed.completed or streamed.failed or not streamed.chunks:
+        return
+    _save_record_in_background(soil_data, summary="".join(streamed.chunks), location=location)
+
+
+def _sse_event(text: str) -> str:
+    """Encode a text chunk as a Server-Sent Events data frame"""
+    return "".join(f"data: {line}\n" for line in text.split("\n")) + "\n"
+
+
 @router.post("/", response_model=AnalysisResult)
 async def analyze_soil(
     request: AnalysisRequest,
@@ -47,10 +102,12 @@ async def analyze_soil(
         # Perform analysis
         result = analyze_soil_data(request.soil_data, request.location)
         
-        # Save to history if requested
+        # Save to history if requested; the commit runs in the threadpool
+        # so it doesn't block the event loop
         if request.save_to_history:
             try:
-                save_soil_record(
+                await run_in_threadpool(
+                    save_soil_record,
                     db=db,
                     soil_data=request.soil_data,
                     location=request.location
@@ -71,7 +128,7 @@ async def analyze_soil(
 @router.post("/recommendations/health-summary", response_model=AIRecommendation)
 async def get_health_summary(
     request: RecommendationRequest,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """
     Get AI-generated health summary and recommendations
@@ -84,33 +141,31 @@ async def get_health_summary(
     - model_used: AI model name
     - timestamp: Generation timestamp
     
-    **Logic:** Calls Groq API with health summary prompt
+    **Logic:** Calls Groq API with health summary prompt; the history
+    record is saved after the response is sent
     """
     try:
         # Generate recommendation
-        content = generate_ai_recommendation(
+        content = await generate_ai_recommendation(
             soil_data=request.soil_data,
             recommendation_type="summary",
             location=request.location,
             model=request.model
         )
         
-        # Save to history with summary
-        try:
-            save_soil_record(
-                db=db,
-                soil_data=request.soil_data,
-                summary=content,
-                location=request.location
-            )
-        except Exception:
-            pass
+        # Save to history with summary, off the critical path
+        background_tasks.add_task(
+            _save_record_in_background,
+            soil_data=request.soil_data,
+            summary=content,
+            location=request.location
+        )
         
         return AIRecommendation(
             recommendation_type="summary",
             content=content,
-            model_used=request.model or settings.DEFAULT_AI_MODEL,
-            timestamp=datetime.now()
+            model_used=request.model or get_settings().DEFAULT_AI_MODEL,
+            timestamp=get_request_time()
         )
         
     except Exception as e:
@@ -120,6 +175,102 @@ async def get_health_summary(
         )
 
 
+@router.post("/recommendations/health-summary/stream")
+async def stream_health_summary(
+    request: RecommendationRequest,
+    background_tasks: BackgroundTasks
+):
+    """
+    Stream AI-generated health summary as Server-Sent Events
+    
+    **Input:** SoilData
+    
+    **Output:** text/event-stream of summary text chunks, followed by an
+    `event: done` frame
+    
+    **Logic:** Streams the Groq response as tokens arrive; the full summary
+    is saved to history after the stream completes
+    """
+    streamed = _StreamedSummary()
+    
+    async def event_stream():
+        async for chunk in stream_ai_recommendation(
+            soil_data=request.soil_data,
+            recommendation_type="summary",
+            location=request.location,
+            model=request.model
+        ):
+            # Failures arrive as a final "⚠️ ..." message, as in the non-streaming path
+            if chunk.startswith("⚠️"):
+                streamed.failed = True
+            streamed.chunks.append(chunk)
+            yield _sse_event(chunk)
+        # Not reached if the client disconnects mid-stream
+        streamed.completed = True
+        yield "event: done\ndata: \n\n"
+    
+    background_tasks.add_task(
+        _save_streamed_summary,
+        soil_data=request.soil_data,
+        streamed=streamed,
+        location=request.location
+    )
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.post("/recommendations/all", response_model=Dict[str, AIRecommendation])
+async def get_all_recommendations(
+    request: RecommendationRequest,
+    background_tasks: BackgroundTasks
+):
+    """
+    Get every AI recommendation type in one call
+    
+    **Input:** SoilData
+    
+    **Output:** Mapping of "summary", "crops", "fertilizer" and "irrigation"
+    to AIRecommendation objects
+    
+    **Logic:** Runs the Groq calls concurrently, so the total latency is
+    close to a single call; the summary is saved to history like
+    health-summary
+    """
+    try:
+        contents = await generate_all_recommendations(
+            soil_data=request.soil_data,
+            location=request.location,
+            model=request.model
+        )
+        
+        # Save to history with summary, off the critical path
+        background_tasks.add_task(
+            _save_record_in_background,
+            soil_data=request.soil_data,
+            summary=contents["summary"],
+            location=request.location
+        )
+        
+        model_used = request.model or get_settings().DEFAULT_AI_MODEL
+        timestamp = get_request_time()
+        
+        return {
+            recommendation_type: AIRecommendation(
+                recommendation_type=recommendation_type,
+                content=content,
+                model_used=model_used,
+                timestamp=timestamp
+            )
+            for recommendation_type, content in contents.items()
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate recommendations: {str(e)}"
+        )
+
+
 @router.post("/recommendations/crops", response_model=AIRecommendation)
 async def get_crop_recommendations(request: RecommendationRequest):
     """
@@ -136,7 +287,7 @@ async def get_crop_recommendations(request: RecommendationRequest):
     **Logic:** Calls Groq API with crop recommendation prompt
     """
     try:
-        content = generate_ai_recommendation(
+        content = await generate_ai_recommendation(
             soil_data=request.soil_data,
             recommendation_type="crops",
             location=request.location,
@@ -146,8 +297,8 @@ async def get_crop_recommendations(request: RecommendationRequest):
         return AIRecommendation(
             recommendation_type="crops",
             content=content,
-            model_used=request.model or settings.DEFAULT_AI_MODEL,
-            timestamp=datetime.now()
+            model_used=request.model or get_settings().DEFAULT_AI_MODEL,
+            timestamp=get_request_time()
         )
         
     except Exception as e:
@@ -173,7 +324,7 @@ async def get_fertilizer_plan(request: RecommendationRequest):
     **Logic:** Calls Groq API with fertilizer planning prompt
     """
     try:
-        content = generate_ai_recommendation(
+        content = await generate_ai_recommendation(
             soil_data=request.soil_data,
             recommendation_type="fertilizer",
             location=request.location,
@@ -183,8 +334,8 @@ async def get_fertilizer_plan(request: RecommendationRequest):
         return AIRecommendation(
             recommendation_type="fertilizer",
             content=content,
-            model_used=request.model or settings.DEFAULT_AI_MODEL,
-            timestamp=datetime.now()
+            model_used=request.model or get_settings().DEFAULT_AI_MODEL,
+            timestamp=get_request_time()
         )
         
     except Exception as e:
@@ -210,7 +361,7 @@ async def get_irrigation_plan(request: RecommendationRequest):
     **Logic:** Calls Groq API with irrigation planning prompt
     """
     try:
-        content = generate_ai_recommendation(
+        content = await generate_ai_recommendation(
             soil_data=request.soil_data,
             recommendation_type="irrigation",
             location=request.location,
@@ -220,8 +371,8 @@ async def get_irrigation_plan(request: RecommendationRequest):
         return AIRecommendation(
             recommendation_type="irrigation",
             content=content,
-            model_used=request.model or settings.DEFAULT_AI_MODEL,
-            timestamp=datetime.now()
+            model_used=request.model or get_settings().DEFAULT_AI_MODEL,
+            timestamp=get_request_time()
         )
         
     except Exception as e:
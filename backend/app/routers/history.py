@@ -3,32 +3,83 @@ History Endpoints
 CRUD operations for soil analysis history
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import csv
-import io
 
-from ..database import get_db
-from ..models import SoilRecord, ErrorResponse
+from ..database import get_async_db, AsyncSessionLocal, SOIL_PARAMETERS
+from ..models import SoilRecord, SoilRecordSummary, ErrorResponse
 from ..crud import (
     get_soil_records,
+    get_soil_record_summaries,
+    get_soil_records_for_export,
     get_soil_record_by_id,
     delete_soil_record,
-    get_record_count
+    get_cached_record_count,
+    encode_history_cursor,
+    decode_history_cursor
 )
 
 
 router = APIRouter(prefix="/history", tags=["History"])
 
 
+class _Echo:
+    """File-like shim so csv.writer returns each row instead of buffering it"""
+    
+    def write(self, value: str) -> str:
+        return value
+
+
+# Rows per streamed chunk; large enough for gzip to compress well
+EXPORT_CHUNK_ROWS = 64
+
+def _parse_cursor(after: Optional[str]):
+    """Decode the after query parameter, rejecting malformed cursors with 400"""
+    if after is None:
+        return None
+    try:
+        return decode_history_cursor(after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _close_export(records, db: AsyncSession) -> None:
+    """Release an export's row stream, then its session and pooled connection"""
+    try:
+        await records.aclose()
+    finally:
+        await db.close()
+
+
+# Soil columns follow SOIL_PARAMETERS order
+_CSV_HEADER = ("ID", "Timestamp", "Location", "Health Score", *SOIL_PARAMETERS, "Summary")
+
+
+def _csv_row(writer, row: tuple) -> str:
+    """Serialize one crud.get_soil_records_for_export() row as a CSV line"""
+    record_id, timestamp, location, health_score, *soil, summary = row
+    return writer.writerow((
+        record_id,
+        timestamp.isoformat(),
+        location or "",
+        health_score,
+        *soil,
+        summary or ""
+    ))
+
+
 @router.get("/", response_model=List[SoilRecord])
 async def get_history(
+    response: Response,
     location: Optional[str] = Query(None, description="Filter by location"),
     limit: int = Query(20, le=100, description="Maximum records to return"),
     offset: int = Query(0, ge=0, description="Number of records to skip"),
-    db: Session = Depends(get_db)
+    after: Optional[str] = Query(None, description="Cursor from X-Next-Cursor: continue after that record"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get soil analysis history
@@ -37,18 +88,69 @@ async def get_history(
     - location: Optional location filter (case-insensitive partial match)
     - limit: Maximum number of records (default 20, max 100)
     - offset: Pagination offset (default 0)
+    - after: Keyset cursor from X-Next-Cursor; preferred over offset for deep pages
     
-    **Output:** List of soil analysis records ordered by timestamp (newest first)
+    **Output:** List of soil analysis records ordered by timestamp (newest first).
+    When a full page is returned, the X-Next-Cursor header holds the cursor
+    for the next page.
     
     **Logic:** Uses crud.get_soil_records() from old backend.py load_history()
     """
+    cursor = _parse_cursor(after)
+    
     try:
-        records = get_soil_records(
+        records = await get_soil_records(
             db=db,
             location=location,
             limit=limit,
-            offset=offset
+            offset=offset,
+            after=cursor
         )
+        
+        if records and len(records) == limit:
+            response.headers["X-Next-Cursor"] = encode_history_cursor(records[-1].timestamp, records[-1].id)
+        
+        return records
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve history: {str(e)}"
+        )
+
+
+@router.get("/summaries", response_model=List[SoilRecordSummary])
+async def get_history_summaries(
+    response: Response,
+    location: Optional[str] = Query(None, description="Filter by location"),
+    limit: int = Query(20, le=100, description="Maximum records to return"),
+    offset: int = Query(0, ge=0, description="Number of records to skip"),
+    after: Optional[str] = Query(None, description="Cursor from X-Next-Cursor: continue after that record"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a lightweight history list
+    
+    Same filtering and pagination as GET /history, but each entry only has
+    id, timestamp, location and health_score. Use GET /history/{id} for
+    the full record.
+    
+    **Output:** List of record summaries ordered by timestamp (newest first)
+    """
+    cursor = _parse_cursor(after)
+    
+    try:
+        records = await get_soil_record_summaries(
+            db=db,
+            location=location,
+            limit=limit,
+            offset=offset,
+            after=cursor
+        )
+        
+        if records and len(records) == limit:
+            response.headers["X-Next-Cursor"] = encode_history_cursor(records[-1].timestamp, records[-1].id)
+        
         return records
         
     except Exception as e:
@@ -61,7 +163,7 @@ async def get_history(
 @router.get("/count")
 async def get_history_count(
     location: Optional[str] = Query(None, description="Filter by location"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get total count of records
@@ -69,12 +171,16 @@ async def get_history_count(
     **Query Parameters:**
     - location: Optional location filter
     
-    **Output:** {"count": int, "location": str or null}
+    **Output:** {"count": int, "estimated": bool, "location": str or null}
+    
+    Counts are cached for a few seconds; estimated is true when the value
+    came from the cache and may not include the very latest writes.
     """
     try:
-        count = get_record_count(db=db, location=location)
+        count, estimated = await get_cached_record_count(db=db, location=location)
         return {
             "count": count,
+            "estimated": estimated,
             "location": location
         }
         
@@ -88,7 +194,7 @@ async def get_history_count(
 @router.get("/{record_id}", response_model=SoilRecord)
 async def get_record(
     record_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a single soil analysis record by ID
@@ -101,7 +207,7 @@ async def get_record(
     **Logic:** Query database by ID
     """
     try:
-        record = get_soil_record_by_id(db=db, record_id=record_id)
+        record = await get_soil_record_by_id(db=db, record_id=record_id)
         
         if not record:
             raise HTTPException(
@@ -123,7 +229,7 @@ async def get_record(
 @router.delete("/{record_id}")
 async def delete_record(
     record_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Delete a soil analysis record
@@ -136,7 +242,7 @@ async def delete_record(
     **Logic:** Delete record from database
     """
     try:
-        success = delete_soil_record(db=db, record_id=record_id)
+        success = await delete_soil_record(db=db, record_id=record_id)
         
         if not success:
             raise HTTPException(
@@ -162,8 +268,7 @@ async def delete_record(
 @router.post("/export")
 async def export_history(
     location: Optional[str] = Query(None, description="Filter by location"),
-    limit: int = Query(100, le=1000, description="Maximum records to export"),
-    db: Session = Depends(get_db)
+    limit: int = Query(100, le=1000, description="Maximum records to export")
 ):
     """
     Export soil analysis history as CSV
@@ -174,67 +279,56 @@ async def export_history(
     
     **Output:** CSV file download
     
-    **Logic:** Convert history records to CSV format
+    **Logic:** Convert history records to CSV format. Rows are streamed
+    from the database to the client, so the export holds its own session
+    (and one pooled connection) until the response ends; it is released
+    by the response's background task.
     """
+    db = AsyncSessionLocal()
+    records = get_soil_records_for_export(db=db, location=location, limit=limit)
     try:
-        # Get records
-        records = get_soil_records(
-            db=db,
-            location=location,
-            limit=limit,
-            offset=0
-        )
+        # Peek the newest record for the 404 check and the filename
+        first = await anext(records, None)
         
-        if not records:
+        if first is None:
             raise HTTPException(
                 status_code=404,
                 detail="No records found to export"
             )
         
-        # Create CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow([
-            "ID", "Timestamp", "Location", "Health Score",
-            "pH", "EC", "Moisture", "Nitrogen", "Phosphorus", 
-            "Potassium", "Microbial", "Temperature", "Summary"
-        ])
-        
-        # Write data rows
-        for record in records:
-            soil = record.soil_data
-            writer.writerow([
-                record.id,
-                record.timestamp.isoformat(),
-                record.location or "",
-                record.health_score,
-                soil.get("pH", ""),
-                soil.get("EC", ""),
-                soil.get("Moisture", ""),
-                soil.get("Nitrogen", ""),
-                soil.get("Phosphorus", ""),
-                soil.get("Potassium", ""),
-                soil.get("Microbial", ""),
-                soil.get("Temperature", ""),
-                record.summary or ""
-            ])
-        
-        # Prepare response
-        output.seek(0)
+        async def row_iter():
+            """Serialize CSV lines as the response is sent, EXPORT_CHUNK_ROWS per chunk"""
+            writer = csv.writer(_Echo())
+            
+            # Header and first row
+            lines = [writer.writerow(_CSV_HEADER), _csv_row(writer, first)]
+            
+            # Remaining data rows
+            async for record in records:
+                lines.append(_csv_row(writer, record))
+                if len(lines) >= EXPORT_CHUNK_ROWS:
+                    yield "".join(lines)
+                    lines.clear()
+            
+            if lines:
+                yield "".join(lines)
         
+        # The background task runs once the response ends, including when the
+        # client disconnects before or during the body
         return StreamingResponse(
-            iter([output.getvalue()]),
+            row_iter(),
             media_type="text/csv",
             headers={
-                "Content-Disposition": f"attachment; filename=soil_history_{location or 'all'}_{records[0].timestamp.strftime('%Y%m%d')}.csv"
-            }
+                "Content-Disposition": f"attachment; filename=soil_history_{location or 'all'}_{first[1].strftime('%Y%m%d')}.csv"
+            },
+            background=BackgroundTask(_close_export, records, db)
         )
         
     except HTTPException:
+        await _close_export(records, db)
         raise
     except Exception as e:
+        await _close_export(records, db)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to export history: {str(e)}"
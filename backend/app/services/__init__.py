@@ -3,11 +3,18 @@ Business Logic Services
 """
 
 from .analysis import calculate_health_score, interpret_parameter
-from .ai import get_groq_client, generate_ai_recommendation
+from .ai import (
+    get_groq_client,
+    generate_ai_recommendation,
+    generate_all_recommendations,
+    stream_ai_recommendation
+)
 
 __all__ = [
     "calculate_health_score",
     "interpret_parameter",
     "get_groq_client",
     "generate_ai_recommendation",
+    "generate_all_recommendations",
+    "stream_ai_recommendation",
 ]
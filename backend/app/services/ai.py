@@ -3,25 +3,67 @@ AI Integration Service
 Extracted from old backend.py - Groq API integration for recommendations
 """
 
+import asyncio
+import hashlib
+import random
+import threading
 import time
-from typing import Optional, Dict
-from groq import Groq
+from typing import Optional, Dict, AsyncIterator, List, Tuple
+
+import httpx
+from groq import AsyncGroq
 
 from ..models import SoilData
-from ..config import settings, get_groq_api_key
+from ..config import get_settings, get_groq_api_key
+
+
+# Global client instance, shared by all requests
+_groq_client: Optional[AsyncGroq] = None
+_groq_client_lock = threading.Lock()
+
+# Keep-alive pool for Groq API calls, so repeated prompts reuse the TLS session
+GROQ_HTTP_LIMITS = httpx.Limits(
+    max_connections=20,
+    max_keepalive_connections=10,
+    keepalive_expiry=60
+)
+
+
+# Recommendation types served by generate_all_recommendations()
+RECOMMENDATION_TYPES = ("summary", "crops", "fertilizer", "irrigation")
+
+# Caps in-flight Groq calls per worker (created on first use)
+_groq_semaphore: Optional[asyncio.Semaphore] = None
 
 
-# Global client instance
-_groq_client: Optional[Groq] = None
+def _get_groq_semaphore() -> asyncio.Semaphore:
+    """Return the shared semaphore limiting concurrent Groq calls"""
+    global _groq_semaphore
+    
+    if _groq_semaphore is None:
+        _groq_semaphore = asyncio.Semaphore(get_settings().AI_MAX_CONCURRENCY)
+    return _groq_semaphore
+
+
+# Successful responses keyed by _cache_key(); each entry is (stored_at, content)
+AI_CACHE_MAX_ENTRIES = 4096
+_ai_cache: Dict[str, Tuple[float, str]] = {}
+
+# Calls in progress per key, so identical concurrent requests share one call
+_ai_inflight: Dict[str, "asyncio.Task[str]"] = {}
 
 
-def get_groq_client() -> Optional[Groq]:
+def get_groq_client() -> Optional[AsyncGroq]:
     """
     Initialize and return Groq client
     Original logic from old backend.py get_groq_client() function (lines 470-490)
     
+    Construction is guarded by a lock so concurrent first calls share a
+    single client and connection pool. The client is async so API calls
+    don't block the event loop.
+    
     Returns:
-        Groq client instance or None if API key not available
+        AsyncGroq client instance or None if API key not available
     """
     global _groq_client
     
@@ -33,11 +75,30 @@ def get_groq_client() -> Optional[Groq]:
     if not api_key:
         return None
     
-    try:
-        _groq_client = Groq(api_key=api_key)
-        return _groq_client
-    except Exception:
-        return None
+    with _groq_client_lock:
+        if _groq_client is not None:
+            return _groq_client
+        
+        try:
+            _groq_client = AsyncGroq(
+                api_key=api_key,
+                http_client=httpx.AsyncClient(
+                    limits=GROQ_HTTP_LIMITS,
+                    timeout=get_settings().AI_TIMEOUT
+                )
+            )
+            return _groq_client
+        except Exception:
+            return None
+
+
+# Task-specific instructions appended to the soil data description
+_TASK_SUFFIX = {
+    "summary": "\n\nProvide: 1) Overall condition 2) Main concerns 3) Top 3 actions. Keep brief.",
+    "crops": "\n\nSuggest TOP 5 suitable crops with reasons. Include Indian varieties.",
+    "fertilizer": "\n\nProvide: NPK ratio, kg/hectare, timing, organic alternatives.",
+    "irrigation": "\n\nProvide: frequency, water amount, best timing for irrigation."
+}
 
 
 def build_prompt(soil: Dict, task: str, location: str = "") -> str:
@@ -51,7 +112,7 @@ def build_prompt(soil: Dict, task: str, location: str = "") -> str:
         location: Optional location string
         
     Returns:
-        Formatted prompt string
+        Formatted prompt string (just the soil data for unknown tasks)
     """
     
     # Base soil data description
@@ -60,18 +121,10 @@ pH: {soil['pH']:.2f}, EC: {soil['EC']:.2f} dS/m, Moisture: {soil['Moisture']:.1f
 N: {soil['Nitrogen']:.2f}, P: {soil['Phosphorus']:.2f}, K: {soil['Potassium']:.2f} mg/kg
 Microbial: {soil['Microbial']:.2f}/10, Temp: {soil['Temperature']:.1f}°C"""
     
-    # Task-specific prompts
-    prompts = {
-        "summary": f"{base}\n\nProvide: 1) Overall condition 2) Main concerns 3) Top 3 actions. Keep brief.",
-        "crops": f"{base}\n\nSuggest TOP 5 suitable crops with reasons. Include Indian varieties.",
-        "fertilizer": f"{base}\n\nProvide: NPK ratio, kg/hectare, timing, organic alternatives.",
-        "irrigation": f"{base}\n\nProvide: frequency, water amount, best timing for irrigation."
-    }
-    
-    return prompts.get(task, base)
+    return base + _TASK_SUFFIX.get(task, "")
 
 
-def call_groq_api(prompt: str, model: str = None) -> str:
+async def call_groq_api(prompt: str, model: str = None) -> str:
     """
     Call Groq API with retry logic
     Original logic from old backend.py call_groq() function (lines 540-620)
@@ -88,6 +141,7 @@ def call_groq_api(prompt: str, model: str = None) -> str:
     if not client:
         return "⚠️ Configure GROQ_API_KEY in environment variables"
     
+    settings = get_settings()
     if not model:
         model = settings.DEFAULT_AI_MODEL
     
@@ -104,22 +158,14 @@ def call_groq_api(prompt: str, model: str = None) -> str:
     
     for attempt in range(max_retries):
         try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an agricultural expert. Provide practical advice for Indian farmers in simple language."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=settings.AI_TEMPERATURE,
-                max_tokens=settings.AI_MAX_TOKENS,
-                timeout=settings.AI_TIMEOUT
-            )
+            async with _get_groq_semaphore():
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=_build_messages(prompt),
+                    temperature=settings.AI_TEMPERATURE,
+                    max_tokens=settings.AI_MAX_TOKENS,
+                    timeout=settings.AI_TIMEOUT
+                )
             
             # Validate response
             if not response or not response.choices or not response.choices[0].message:
@@ -134,11 +180,130 @@ def call_groq_api(prompt: str, model: str = None) -> str:
         except Exception as e:
             last_error = e
             if attempt < max_retries - 1:
-                time.sleep(1)  # Brief delay before retry
+                # Exponential backoff with jitter before retry
+                await asyncio.sleep(0.25 * 2 ** attempt + random.uniform(0, 0.25))
             continue
     
     # All retries failed
-    error_msg = str(last_error) if last_error else "Unknown error"
+    return _friendly_error_message(last_error)
+
+
+async def stream_groq_api(prompt: str, model: str = None) -> AsyncIterator[str]:
+    """
+    Stream a Groq chat completion as text chunks
+    
+    Same validation as call_groq_api(), but without retries: once tokens
+    have been sent to the client the request cannot be replayed.
+    
+    Args:
+        prompt: The prompt to send
+        model: AI model to use (defaults to settings.DEFAULT_AI_MODEL)
+        
+    Yields:
+        Response text chunks, or a single error message
+    """
+    
+    client = get_groq_client()
+    if not client:
+        yield "⚠️ Configure GROQ_API_KEY in environment variables"
+        return
+    
+    settings = get_settings()
+    if not model:
+        model = settings.DEFAULT_AI_MODEL
+    
+    # Validate inputs
+    if not prompt or not prompt.strip():
+        yield "⚠️ Error: Empty prompt"
+        return
+    
+    if len(prompt) > 10000:
+        yield "⚠️ Error: Prompt too long"
+        return
+    
+    try:
+        async with _get_groq_semaphore():
+            stream = await client.chat.completions.create(
+                model=model,
+                messages=_build_messages(prompt),
+                temperature=settings.AI_TEMPERATURE,
+                max_tokens=settings.AI_MAX_TOKENS,
+                timeout=settings.AI_TIMEOUT,
+                stream=True
+            )
+            
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+                
+    except Exception as e:
+        yield _friendly_error_message(e)
+
+
+def _build_messages(prompt: str) -> list:
+    """Build the chat message list for a prompt"""
+    return [
+        {
+            "role": "system",
+            "content": "You are an agricultural expert. Provide practical advice for Indian farmers in simple language."
+        },
+        {
+            "role": "user",
+            "content": prompt
+        }
+    ]
+
+
+def _cache_key(prompt: str, model: str) -> str:
+    """
+    Fingerprint a request for the response cache
+    The prompt already rounds soil values to display precision, so
+    readings that differ only by float noise share a key.
+    """
+    return hashlib.blake2b(
+        f"{model}\0{prompt}".encode(), digest_size=16
+    ).hexdigest()
+
+
+async def _call_groq_cached(prompt: str, model: str) -> str:
+    """
+    call_groq_api() with a TTL cache and request coalescing
+    Error messages are returned but never cached.
+    """
+    ttl = get_settings().AI_CACHE_TTL
+    if ttl <= 0:
+        return await call_groq_api(prompt, model)
+    
+    key = _cache_key(prompt, model)
+    
+    cached = _ai_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    
+    task = _ai_inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(call_groq_api(prompt, model))
+        _ai_inflight[key] = task
+        task.add_done_callback(lambda _: _ai_inflight.pop(key, None))
+    
+    # Shielded so one client disconnecting doesn't cancel the shared call
+    content = await asyncio.shield(task)
+    
+    if not content.startswith("⚠️"):
+        if len(_ai_cache) >= AI_CACHE_MAX_ENTRIES:
+            # Drop the oldest entry (dicts keep insertion order)
+            _ai_cache.pop(next(iter(_ai_cache)))
+        _ai_cache[key] = (time.monotonic(), content)
+    
+    return content
+
+
+def _friendly_error_message(error: Optional[Exception]) -> str:
+    """Map a Groq API failure to a user-facing message"""
+    error_msg = str(error) if error else "Unknown error"
     
     if "timeout" in error_msg.lower():
         return "⚠️ Request timed out. Please try again."
@@ -150,7 +315,7 @@ def call_groq_api(prompt: str, model: str = None) -> str:
         return "⚠️ AI service temporarily unavailable. Please try again later."
 
 
-def generate_ai_recommendation(
+async def generate_ai_recommendation(
     soil_data: SoilData,
     recommendation_type: str,
     location: str = None,
@@ -175,7 +340,60 @@ def generate_ai_recommendation(
     # Build prompt
     prompt = build_prompt(soil_dict, recommendation_type, location or "")
     
-    # Call API
-    result = call_groq_api(prompt, model)
+    # Call API (identical recent requests are served from cache)
+    result = await _call_groq_cached(prompt, model or get_settings().DEFAULT_AI_MODEL)
     
     return result
+
+
+async def generate_all_recommendations(
+    soil_data: SoilData,
+    location: str = None,
+    model: str = None
+) -> Dict[str, str]:
+    """
+    Generate every recommendation type concurrently
+    
+    The Groq calls are independent, so they run in parallel with
+    asyncio.gather; AI_MAX_CONCURRENCY still bounds in-flight calls.
+    
+    Args:
+        soil_data: Validated soil data
+        location: Optional location string
+        model: Optional AI model override
+        
+    Returns:
+        Mapping of recommendation type to generated text
+    """
+    
+    results: List[str] = await asyncio.gather(*(
+        generate_ai_recommendation(soil_data, recommendation_type, location, model)
+        for recommendation_type in RECOMMENDATION_TYPES
+    ))
+    
+    return dict(zip(RECOMMENDATION_TYPES, results))
+
+
+async def stream_ai_recommendation(
+    soil_data: SoilData,
+    recommendation_type: str,
+    location: str = None,
+    model: str = None
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of generate_ai_recommendation()
+    
+    Args:
+        soil_data: Validated soil data
+        recommendation_type: Type of recommendation ("summary", "crops", "fertilizer")
+        location: Optional location string
+        model: Optional AI model override
+        
+    Yields:
+        AI-generated recommendation text chunks
+    """
+    
+    prompt = build_prompt(soil_data.model_dump(), recommendation_type, location or "")
+    
+    async for chunk in stream_groq_api(prompt, model):
+        yield chunk
@@ -3,9 +3,15 @@ Soil Analysis Service
 Extracted from old backend.py - all soil parameter analysis logic
 """
 
+from bisect import bisect_right
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, Tuple
+
+import numpy as np
+
 from ..models import SoilData, ParameterInterpretation
-from ..config import settings
+from ..context import get_request_time
 
 
 def calculate_health_score(soil_data: SoilData) -> float:
@@ -27,37 +33,166 @@ def calculate_health_score(soil_data: SoilData) -> float:
         Health score between 0 and 100
     """
     try:
-        # Convert to dict for easier access
-        soil = soil_data.model_dump()
-        
-        # pH component (25 points) - optimal at 7.0
-        ph = max(0, min(25, 25 - abs(soil['pH'] - 7.0) * 3.5))
-        
-        # EC component (25 points) - lower is better
-        ec = max(0, min(25, 25 - min(soil['EC'], 4.0) * 6.25))
-        
-        # Moisture component (20 points) - optimal range 25-40%
-        if 25 <= soil['Moisture'] <= 40:
-            moist = 20
-        else:
-            moist = max(0, min(20, 20 - abs(soil['Moisture'] - 32.5) * 0.5))
-        
-        # NPK component (30 points total - 10 each)
-        n_score = min(soil['Nitrogen'] / 80 * 10, 10)
-        p_score = min(soil['Phosphorus'] / 50 * 10, 10)
-        k_score = min(soil['Potassium'] / 250 * 10, 10)
-        npk = n_score + p_score + k_score
-        
-        # Total score
-        score = min(max(ph + ec + moist + npk, 0), 100)
-        
-        return round(score, 2)
+        return _health_score(
+            soil_data.pH,
+            soil_data.EC,
+            soil_data.Moisture,
+            soil_data.Nitrogen,
+            soil_data.Phosphorus,
+            soil_data.Potassium
+        )
         
     except Exception as e:
         # Return neutral score on error
         return 50.0
 
 
+@lru_cache(maxsize=1024)
+def _health_score(
+    pH: float,
+    EC: float,
+    Moisture: float,
+    Nitrogen: float,
+    Phosphorus: float,
+    Potassium: float
+) -> float:
+    """
+    Health score formula, memoized on the six inputs it depends on
+    An analyze request that also saves to history scores the same
+    sample twice; the second call is a cache hit.
+    """
+    # pH component (25 points) - optimal at 7.0
+    ph = max(0, min(25, 25 - abs(pH - 7.0) * 3.5))
+    
+    # EC component (25 points) - lower is better
+    ec = max(0, min(25, 25 - min(EC, 4.0) * 6.25))
+    
+    # Moisture component (20 points) - optimal range 25-40%
+    if 25 <= Moisture <= 40:
+        moist = 20
+    else:
+        moist = max(0, min(20, 20 - abs(Moisture - 32.5) * 0.5))
+    
+    # NPK component (30 points total - 10 each)
+    n_score = min(Nitrogen / 80 * 10, 10)
+    p_score = min(Phosphorus / 50 * 10, 10)
+    k_score = min(Potassium / 250 * 10, 10)
+    npk = n_score + p_score + k_score
+    
+    # Total score
+    score = min(max(ph + ec + moist + npk, 0), 100)
+    
+    return round(score, 2)
+
+
+def calculate_health_scores(soil: np.ndarray) -> np.ndarray:
+    """
+    Vectorized health score for many samples at once
+    
+    Same formula as calculate_health_score(), for batch work such as
+    re-scoring history. Computed in float64 so results match the scalar
+    version exactly.
+    
+    Args:
+        soil: (N, 8) array with columns in SoilData field order
+              [pH, EC, Moisture, Nitrogen, Phosphorus, Potassium, Microbial, Temperature]
+              (Microbial and Temperature are not scored)
+        
+    Returns:
+        (N,) array of health scores between 0 and 100
+    """
+    soil = np.asarray(soil, dtype=np.float64)
+    
+    # pH component (25 points) - optimal at 7.0
+    ph = np.clip(25 - np.abs(soil[:, 0] - 7.0) * 3.5, 0, 25)
+    
+    # EC component (25 points) - lower is better
+    ec = np.clip(25 - np.minimum(soil[:, 1], 4.0) * 6.25, 0, 25)
+    
+    # Moisture component (20 points) - optimal range 25-40%
+    moisture = soil[:, 2]
+    moist = np.where(
+        (moisture >= 25) & (moisture <= 40),
+        20.0,
+        np.clip(20 - np.abs(moisture - 32.5) * 0.5, 0, 20)
+    )
+    
+    # NPK component (30 points total - 10 each)
+    npk = (
+        np.minimum(soil[:, 3] / 80 * 10, 10)
+        + np.minimum(soil[:, 4] / 50 * 10, 10)
+        + np.minimum(soil[:, 5] / 250 * 10, 10)
+    )
+    
+    # Total score
+    return np.clip(ph + ec + moist + npk, 0, 100).round(2)
+
+
+# SoilData fields in declaration order
+_PARAMS = tuple(SoilData.model_fields)
+
+# Parameter interpretation ranges (read-only)
+# Format: (min, max, status, emoji); ranges for a parameter are contiguous
+_INTERPRETATION_DATA = MappingProxyType({
+    'pH': (
+        (0, 5.5, "Acidic", "🔴"),
+        (5.5, 6.5, "Low", "🟡"),
+        (6.5, 7.5, "Optimal", "🟢"),
+        (7.5, 8.5, "High", "🟡"),
+        (8.5, 15, "Alkaline", "🔴")
+    ),
+    'EC': (
+        (0, 0.8, "Low", "🟢"),
+        (0.8, 2, "Moderate", "🟡"),
+        (2, 4, "High", "🟠"),
+        (4, 25, "Very High", "🔴")
+    ),
+    'Moisture': (
+        (0, 15, "Dry", "🔴"),
+        (15, 25, "Low", "🟡"),
+        (25, 40, "Optimal", "🟢"),
+        (40, 60, "High", "🟡"),
+        (60, 101, "Wet", "🔴")
+    ),
+    'Nitrogen': (
+        (0, 40, "Low", "🔴"),
+        (40, 80, "Optimal", "🟢"),
+        (80, 501, "High", "🟡")
+    ),
+    'Phosphorus': (
+        (0, 20, "Low", "🔴"),
+        (20, 50, "Optimal", "🟢"),
+        (50, 201, "High", "🟡")
+    ),
+    'Potassium': (
+        (0, 100, "Low", "🔴"),
+        (100, 250, "Optimal", "🟢"),
+        (250, 501, "High", "🟡")
+    ),
+    'Microbial': (
+        (0, 3, "Poor", "🔴"),
+        (3, 7, "Good", "🟢"),
+        (7, 11, "Excellent", "💚")
+    ),
+    'Temperature': (
+        (0, 10, "Cold", "🔵"),
+        (10, 30, "Optimal", "🟢"),
+        (30, 51, "Hot", "🔴")
+    )
+})
+
+# Precomputed lookup per parameter: (lowest bound, upper bounds, statuses, emojis)
+_BOUNDS = MappingProxyType({
+    param: (
+        ranges[0][0],
+        tuple(high for _, high, _, _ in ranges),
+        tuple(status for _, _, status, _ in ranges),
+        tuple(emoji for _, _, _, emoji in ranges)
+    )
+    for param, ranges in _INTERPRETATION_DATA.items()
+})
+
+
 def interpret_parameter(param: str, val: float) -> Tuple[str, str]:
     """
     Interpret a soil parameter and return (status, emoji)
@@ -74,82 +209,64 @@ def interpret_parameter(param: str, val: float) -> Tuple[str, str]:
     Returns:
         Tuple of (status_string, emoji_string)
     """
+    bounds = _BOUNDS.get(param)
     
-    # Parameter interpretation ranges
-    # Format: (min, max, status, emoji)
-    interpretation_data = {
-        'pH': [
-            (0, 5.5, "Acidic", "🔴"),
-            (5.5, 6.5, "Low", "🟡"),
-            (6.5, 7.5, "Optimal", "🟢"),
-            (7.5, 8.5, "High", "🟡"),
-            (8.5, 15, "Alkaline", "🔴")
-        ],
-        'EC': [
-            (0, 0.8, "Low", "🟢"),
-            (0.8, 2, "Moderate", "🟡"),
-            (2, 4, "High", "🟠"),
-            (4, 25, "Very High", "🔴")
-        ],
-        'Moisture': [
-            (0, 15, "Dry", "🔴"),
-            (15, 25, "Low", "🟡"),
-            (25, 40, "Optimal", "🟢"),
-            (40, 60, "High", "🟡"),
-            (60, 101, "Wet", "🔴")
-        ],
-        'Nitrogen': [
-            (0, 40, "Low", "🔴"),
-            (40, 80, "Optimal", "🟢"),
-            (80, 501, "High", "🟡")
-        ],
-        'Phosphorus': [
-            (0, 20, "Low", "🔴"),
-            (20, 50, "Optimal", "🟢"),
-            (50, 201, "High", "🟡")
-        ],
-        'Potassium': [
-            (0, 100, "Low", "🔴"),
-            (100, 250, "Optimal", "🟢"),
-            (250, 501, "High", "🟡")
-        ],
-        'Microbial': [
-            (0, 3, "Poor", "🔴"),
-            (3, 7, "Good", "🟢"),
-            (7, 11, "Excellent", "💚")
-        ],
-        'Temperature': [
-            (0, 10, "Cold", "🔵"),
-            (10, 30, "Optimal", "🟢"),
-            (30, 51, "Hot", "🔴")
-        ]
-    }
-    
-    # Get ranges for parameter
-    ranges = interpretation_data.get(param, [])
-    
-    # Find matching range
-    for low, high, status, emoji in ranges:
-        if low <= val < high:
-            return status, emoji
+    # Find matching range: highs[idx - 1] <= val < highs[idx]
+    if bounds is not None:
+        low, highs, statuses, emojis = bounds
+        idx = bisect_right(highs, val)
+        if val >= low and idx < len(highs):
+            return statuses[idx], emojis[idx]
     
     # Default if no match
     return "Unknown", "⚪"
 
 
+def interpret_parameters(param: str, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized interpret_parameter() for a batch of values of one parameter
+    
+    Args:
+        param: Parameter name (pH, EC, Moisture, etc.)
+        values: 1-D array of parameter values
+        
+    Returns:
+        Tuple of (statuses, emojis) object arrays, same length as values
+    """
+    values = np.asarray(values, dtype=np.float64)
+    bounds = _BOUNDS.get(param)
+    
+    if bounds is None:
+        return np.full(values.shape, "Unknown", dtype=object), np.full(values.shape, "⚪", dtype=object)
+    
+    low, highs, statuses, emojis = bounds
+    
+    # One trailing "Unknown" slot catches values at or above the last bound
+    status_table = np.array(statuses + ("Unknown",), dtype=object)
+    emoji_table = np.array(emojis + ("⚪",), dtype=object)
+    
+    idx = np.searchsorted(np.array(highs), values, side="right")
+    idx[values < low] = len(highs)
+    
+    return status_table[idx], emoji_table[idx]
+
+
+# Display unit per parameter (read-only)
+_UNITS = MappingProxyType({
+    'pH': 'pH',
+    'EC': 'dS/m',
+    'Moisture': '%',
+    'Nitrogen': 'mg/kg',
+    'Phosphorus': 'mg/kg',
+    'Potassium': 'mg/kg',
+    'Microbial': 'Index',
+    'Temperature': '°C'
+})
+
+
 def get_parameter_unit(param: str) -> str:
     """Get the unit for a parameter"""
-    units = {
-        'pH': 'pH',
-        'EC': 'dS/m',
-        'Moisture': '%',
-        'Nitrogen': 'mg/kg',
-        'Phosphorus': 'mg/kg',
-        'Potassium': 'mg/kg',
-        'Microbial': 'Index',
-        'Temperature': '°C'
-    }
-    return units.get(param, '')
+    return _UNITS.get(param, '')
 
 
 def analyze_soil_data(soil_data: SoilData, location: str = None) -> Dict:
@@ -163,16 +280,14 @@ def analyze_soil_data(soil_data: SoilData, location: str = None) -> Dict:
     Returns:
         Dictionary with health score and parameter interpretations
     """
-    from datetime import datetime
-    
     # Calculate health score
     health_score = calculate_health_score(soil_data)
     
     # Interpret each parameter
     parameters = {}
-    soil_dict = soil_data.model_dump()
     
-    for param_name, value in soil_dict.items():
+    for param_name in _PARAMS:
+        value = getattr(soil_data, param_name)
         status, emoji = interpret_parameter(param_name, value)
         unit = get_parameter_unit(param_name)
         
@@ -186,6 +301,6 @@ def analyze_soil_data(soil_data: SoilData, location: str = None) -> Dict:
     return {
         "health_score": health_score,
         "parameters": parameters,
-        "timestamp": datetime.now(),
+        "timestamp": get_request_time(),
         "location": location
     }
@@ -5,10 +5,15 @@ Quick tests to verify all endpoints are working
 
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 BASE_URL = "http://localhost:8000"
 
+# Shared session so every test reuses keep-alive connections
+SESSION = requests.Session()
+SESSION.headers.update({"Accept": "application/json"})
+
 # Sample soil data
 SAMPLE_SOIL_DATA = {
     "pH": 7.0,
@@ -25,7 +30,7 @@ SAMPLE_SOIL_DATA = {
 def test_health_check():
     """Test health check endpoint"""
     print("\n🔍 Testing Health Check...")
-    response = requests.get(f"{BASE_URL}/health")
+    response = SESSION.get(f"{BASE_URL}/health")
     print(f"Status: {response.status_code}")
     print(f"Response: {json.dumps(response.json(), indent=2)}")
     assert response.status_code == 200
@@ -35,7 +40,7 @@ def test_health_check():
 def test_analyze_soil():
     """Test soil analysis endpoint"""
     print("\n🔍 Testing Soil Analysis...")
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}/api/analyze",
         json={
             "soil_data": SAMPLE_SOIL_DATA,
@@ -62,7 +67,7 @@ def test_analyze_soil():
 def test_health_summary():
     """Test AI health summary endpoint"""
     print("\n🔍 Testing AI Health Summary...")
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}/api/analyze/recommendations/health-summary",
         json={
             "soil_data": SAMPLE_SOIL_DATA,
@@ -84,7 +89,7 @@ def test_health_summary():
 def test_crop_recommendations():
     """Test AI crop recommendations endpoint"""
     print("\n🔍 Testing Crop Recommendations...")
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}/api/analyze/recommendations/crops",
         json={
             "soil_data": SAMPLE_SOIL_DATA,
@@ -104,7 +109,7 @@ def test_crop_recommendations():
 def test_fertilizer_plan():
     """Test AI fertilizer plan endpoint"""
     print("\n🔍 Testing Fertilizer Plan...")
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}/api/analyze/recommendations/fertilizer",
         json={
             "soil_data": SAMPLE_SOIL_DATA,
@@ -124,7 +129,7 @@ def test_fertilizer_plan():
 def test_get_history():
     """Test get history endpoint"""
     print("\n🔍 Testing Get History...")
-    response = requests.get(f"{BASE_URL}/api/history?limit=5")
+    response = SESSION.get(f"{BASE_URL}/api/history?limit=5")
     print(f"Status: {response.status_code}")
     result = response.json()
     print(f"Records found: {len(result)}")
@@ -144,7 +149,7 @@ def test_get_history():
 def test_get_record_by_id(record_id):
     """Test get single record endpoint"""
     print(f"\n🔍 Testing Get Record by ID ({record_id})...")
-    response = requests.get(f"{BASE_URL}/api/history/{record_id}")
+    response = SESSION.get(f"{BASE_URL}/api/history/{record_id}")
     print(f"Status: {response.status_code}")
     
     if response.status_code == 200:
@@ -160,7 +165,7 @@ def test_get_record_by_id(record_id):
 def test_history_count():
     """Test history count endpoint"""
     print("\n🔍 Testing History Count...")
-    response = requests.get(f"{BASE_URL}/api/history/count")
+    response = SESSION.get(f"{BASE_URL}/api/history/count")
     print(f"Status: {response.status_code}")
     result = response.json()
     print(f"Total records: {result['count']}")
@@ -176,7 +181,7 @@ def test_validation_errors():
     invalid_data = SAMPLE_SOIL_DATA.copy()
     invalid_data["pH"] = 15.0  # Out of range
     
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}/api/analyze",
         json={
             "soil_data": invalid_data,
@@ -188,6 +193,13 @@ def test_validation_errors():
     print("✅ Validation errors working correctly")
 
 
+def run_parallel(*tests):
+    """Run independent tests concurrently; returns their results in order"""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(test) for test in tests]
+        return [future.result() for future in futures]
+
+
 def run_all_tests():
     """Run all tests"""
     print("=" * 60)
@@ -196,13 +208,10 @@ def run_all_tests():
     
     try:
         # Basic tests
-        test_health_check()
-        test_analyze_soil()
-        test_validation_errors()
+        run_parallel(test_health_check, test_analyze_soil, test_validation_errors)
         
-        # History tests
-        history = test_get_history()
-        test_history_count()
+        # History tests (after analysis has saved a record)
+        history, _ = run_parallel(test_get_history, test_history_count)
         
         if history:
             test_get_record_by_id(history[0]['id'])
@@ -211,9 +220,7 @@ def run_all_tests():
         print("\n" + "=" * 60)
         print("🤖 AI Recommendation Tests (requires GROQ_API_KEY)")
         print("=" * 60)
-        test_health_summary()
-        test_crop_recommendations()
-        test_fertilizer_plan()
+        run_parallel(test_health_summary, test_crop_recommendations, test_fertilizer_plan)
         
         print("\n" + "=" * 60)
         print("✅ All tests completed!")
@@ -0,0 +1,107 @@
+"""
+Upgrade-path tests for databases written by earlier versions
+Runs against a temporary SQLite file: pytest backend/test_migrations.py
+"""
+
+import hashlib
+import importlib
+import json
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_SOIL = {
+    "pH": 7.0,
+    "EC": 1.5,
+    "Moisture": 30.0,
+    "Nitrogen": 60.0,
+    "Phosphorus": 35.0,
+    "Potassium": 180.0,
+    "Microbial": 5.5,
+    "Temperature": 25.0
+}
+
+
+def _legacy_hash(soil_data: dict) -> str:
+    """data_hash as the original crud.create_data_hash() computed it"""
+    return hashlib.md5(json.dumps(soil_data, sort_keys=True).encode()).hexdigest()
+
+
+@pytest.fixture
+def legacy_db(tmp_path, monkeypatch):
+    """A soil_records database in the original schema, with one MD5-hashed record"""
+    db_path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE soil_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_hash VARCHAR NOT NULL UNIQUE,
+            soil_data TEXT NOT NULL,
+            timestamp DATETIME NOT NULL,
+            summary TEXT,
+            location VARCHAR,
+            health_score FLOAT
+        )
+    """)
+    conn.execute(
+        "INSERT INTO soil_records (data_hash, soil_data, timestamp, location, health_score) "
+        "VALUES (?, ?, '2024-01-01 10:00:00', 'Pune', 80.0)",
+        (_legacy_hash(SAMPLE_SOIL), json.dumps(SAMPLE_SOIL))
+    )
+    conn.commit()
+    conn.close()
+
+    # Import the app fresh so database.py runs init_database() on this file
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{db_path}")
+    for name in [m for m in sys.modules if m == "app" or m.startswith("app.")]:
+        monkeypatch.delitem(sys.modules, name)
+    yield db_path
+
+    database = sys.modules.get("app.database")
+    if database is not None:
+        database.engine.dispose()
+
+
+def _count(db_path) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM soil_records").fetchone()[0]
+
+
+def test_legacy_hashes_are_migrated(legacy_db):
+    """Startup rehashes MD5 records, so re-saving the same sample is still a duplicate"""
+    database = importlib.import_module("app.database")
+    crud = importlib.import_module("app.crud")
+    from app.models import SoilData
+
+    with sqlite3.connect(legacy_db) as conn:
+        stored_hash, = conn.execute("SELECT data_hash FROM soil_records").fetchone()
+        version, = conn.execute("PRAGMA user_version").fetchone()
+    assert stored_hash == crud.create_data_hash(SoilData(**SAMPLE_SOIL).model_dump())
+    assert version == database.DATA_HASH_VERSION
+
+    db = database.SessionLocal()
+    try:
+        assert crud.save_soil_record(db, SoilData(**SAMPLE_SOIL), location="Pune") is None
+    finally:
+        db.close()
+    assert _count(legacy_db) == 1
+
+
+def test_migration_skips_unreadable_rows(legacy_db):
+    """Records whose soil_data can't be parsed keep their old hash instead of failing startup"""
+    with sqlite3.connect(legacy_db) as conn:
+        conn.execute(
+            "INSERT INTO soil_records (data_hash, soil_data, timestamp) "
+            "VALUES ('corrupt', '{not json', '2024-01-02 10:00:00')"
+        )
+
+    importlib.import_module("app.database")
+
+    with sqlite3.connect(legacy_db) as conn:
+        hashes = dict(conn.execute("SELECT soil_data, data_hash FROM soil_records"))
+    assert hashes["{not json"] == "corrupt"
+    assert _count(legacy_db) == 2
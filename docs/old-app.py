@@ -4,8 +4,11 @@ Contains all Streamlit UI components, styling, and user interface logic
 """
 
 import streamlit as st
+import numpy as np
 import hashlib
+import operator
 from datetime import datetime
+from types import MappingProxyType
 
 # Import all backend functions and utilities
 from backend import (
@@ -16,6 +19,7 @@ from backend import (
     log_event,
     log_error,
     is_production_environment,
+    is_logging_enabled,
     
     # Business logic
     get_health_score,
@@ -29,8 +33,8 @@ from backend import (
     get_groq_client,
     build_prompt,
     call_groq,
-    save_record,
-    load_history
+    call_groq_batch,
+    save_record
 )
 
 # Page configuration
@@ -41,17 +45,183 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource(show_spinner=False)
+def _bootstrap() -> bool:
+    """Process-wide one-time startup work; cache_resource runs the body once per server process"""
+    log_application_startup()
+    return True
+
+
 # Initialize session and logging
+# initialize_session() stays per session: it assigns this session's ID
 initialize_session()
-log_application_startup()
+_bootstrap()
+
+# Logging is local-only; check once per session rather than on every call
+if "_log_enabled" not in st.session_state:
+    st.session_state._log_enabled = is_logging_enabled()
+
+
+def _log_noop(*args, **kwargs):
+    """Stand-in for log_* helpers when logging is disabled"""
+
+
+_log_user_action = log_user_action if st.session_state._log_enabled else _log_noop
+_log_event = log_event if st.session_state._log_enabled else _log_noop
 
 # Init session state
-for key in ['soil_data', 'location', 'selected_model']:
-    if key not in st.session_state:
-        st.session_state[key] = None if key == 'soil_data' else ("" if key == 'location' else "llama-3.3-70b-versatile")
+st.session_state.setdefault('soil_data', None)
+st.session_state.setdefault('location', "")
+st.session_state.setdefault('selected_model', "llama-3.3-70b-versatile")
+
+# Soil parameters in display order, their units, and a C-level getter for all values at once
+_KEYS = ("pH", "EC", "Moisture", "Nitrogen", "Phosphorus", "Potassium", "Microbial", "Temperature")
+_UNITS = ("pH", "dS/m", "%", "mg/kg", "mg/kg", "mg/kg", "Index", "°C")
+_GET_VALUES = operator.itemgetter(*_KEYS)
+
+# Full-scale value per parameter for the progress bars
+_PROGRESS_RANGES = MappingProxyType({"pH": 14.0, "EC": 4.0, "Moisture": 100.0, "Nitrogen": 100.0, "Phosphorus": 100.0, "Potassium": 300.0, "Microbial": 10.0, "Temperature": 50.0})
+_RANGE_ARR = np.array([_PROGRESS_RANGES[key] for key in _KEYS], dtype=np.float64)
+
+# Accepted input range per parameter, with the message shown when exceeded
+_LIMITS = (
+    ("pH", 0, 14, "pH must be between 0 and 14"),
+    ("EC", 0, 20, "EC cannot exceed 20 dS/m"),
+    ("Moisture", 0, 100, "Moisture cannot exceed 100%"),
+    ("Nitrogen", 0, 500, "Nitrogen cannot exceed 500 mg/kg"),
+    ("Phosphorus", 0, 200, "Phosphorus cannot exceed 200 mg/kg"),
+    ("Potassium", 0, 500, "Potassium cannot exceed 500 mg/kg"),
+    ("Microbial", 0, 10, "Microbial index cannot exceed 10"),
+    ("Temperature", 0, 50, "Temperature cannot exceed 50°C")
+)
+
+# Soil form inputs per column: (heading, ((key, label, min, max, default, step, help), ...))
+_FORM_COLUMNS = (
+    ("**🔬 Chemical Properties**", (
+        ("pH", "pH Level", 0.0, 14.0, 7.0, 0.1,
+         "Soil acidity/alkalinity. Optimal range: 6.5-7.5"),
+        ("EC", "Electrical Conductivity (dS/m)", 0.0, 20.0, 2.0, 0.1,
+         "Soil salinity indicator. <2.0 dS/m is ideal for most crops"),
+        ("Nitrogen", "Available Nitrogen (mg/kg)", 0.0, 500.0, 50.0, 1.0,
+         "Essential for plant growth. Optimal: 40-80 mg/kg"),
+        ("Phosphorus", "Available Phosphorus (mg/kg)", 0.0, 200.0, 30.0, 1.0,
+         "Important for root development. Optimal: 20-50 mg/kg")
+    )),
+    ("**🌡️ Physical & Biological Properties**", (
+        ("Moisture", "Moisture Content (%)", 0.0, 100.0, 25.0, 1.0,
+         "Current soil water content. Optimal: 25-40%"),
+        ("Temperature", "Soil Temperature (°C)", 0.0, 50.0, 25.0, 0.5,
+         "Current soil temperature affects microbial activity"),
+        ("Potassium", "Available Potassium (mg/kg)", 0.0, 500.0, 150.0, 1.0,
+         "Essential for disease resistance. Optimal: 100-250 mg/kg"),
+        ("Microbial", "Microbial Activity Index", 0.0, 10.0, 5.0, 0.1,
+         "Biological activity level (0-10 scale). Higher is better")
+    ))
+)
+
+_FORM_DEFAULTS = MappingProxyType({
+    key: default for _heading, fields in _FORM_COLUMNS for key, _label, _low, _high, default, _step, _help in fields
+})
+
+# Card CSS class and bar color per interpret() emoji; anything else is critical
+_STATUS_STYLE = {"🟢": ("status-good", "#10b981"), "💚": ("status-good", "#10b981"), "🟡": ("status-warning", "#f59e0b")}
+_CRITICAL_STYLE = ("status-critical", "#ef4444")
+
+@st.cache_data(show_spinner=False)
+def _prompt_and_key(soil_items: tuple, task: str, loc: str) -> tuple:
+    """Build the AI prompt and its call_groq cache key, memoized per (soil, task, location)"""
+    prompt = build_prompt(dict(soil_items), task, loc)
+    return prompt, hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def _interpret_cached(param: str, value: float) -> tuple:
+    """interpret() memoized per (parameter, exact value); values are not bucketed so range edges stay exact"""
+    return interpret(param, value)
+
+
+def _interpret_ph_fast(value: float) -> tuple:
+    """pH interpretation with a one-slot per-session memo in front of _interpret_cached()"""
+    last = st.session_state.get('_last_ph')
+    if last is not None and last[0] == value:
+        return last[1]
+    
+    result = _interpret_cached('pH', value)
+    st.session_state._last_ph = (value, result)
+    return result
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _health(soil_items: tuple) -> float:
+    """get_health_score() memoized on the soil values, so unchanged samples skip recomputation on reruns"""
+    return get_health_score(dict(soil_items))
+
+# Dashboard AI buttons: (task, button label, spinner text, primary button)
+# The result is stored in st.session_state[task]; only summaries are saved to history
+_AI_TASKS = (
+    ("summary", "✨ Health Summary", "🧠 AI is analyzing your soil...", True),
+    ("crops", "🌾 Crop Recommendations", "🌱 Finding optimal crops...", False),
+    ("fertilizer", "💊 Fertilizer Plan", "🧪 Calculating nutrients...", False)
+)
+_AI_KEYS = tuple(task for task, *_ in _AI_TASKS)
+
+# Sentinel for single-lookup pops from session state
+_MISSING = object()
+
+
+class _AIFailure(Exception):
+    """Carries a call_groq() error message out of _ai() so st.cache_data does not store it"""
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _ai(task: str, loc: str, soil_items: tuple, model: str) -> str:
+    """
+    call_groq() memoized per (task, location, soil sample, model)
+    
+    model is part of the key because call_groq() reads the selected model
+    from session state. Error replies (prefixed with ⚠️) are raised rather
+    than returned so they are not cached.
+    """
+    prompt, key = _prompt_and_key(soil_items, task, loc)
+    result = call_groq(key, prompt, task)
+    if result.startswith("⚠️"):
+        raise _AIFailure(result)
+    return result
+
+
+def _run_ai(task: str, spinner_text: str, soil: dict, loc: str, health: float):
+    """Run one AI task for the current soil sample and store the result in session state"""
+    event = task.upper()
+    _log_user_action(f'AI_{event}_REQUESTED', {'location': loc, 'health_score': health})
+    # st.spinner only appears after a short delay, so cached repeats return without one
+    with st.spinner(spinner_text):
+        try:
+            result = _ai(task, loc, tuple(sorted(soil.items())), st.session_state.selected_model)
+        except _AIFailure as failure:
+            result = str(failure)
+        st.session_state[task] = result
+        if task == "summary":
+            save_record(soil, result, loc)
+        _log_user_action(f'AI_{event}_COMPLETED', {'result_length': len(result)})
+
+
+def _run_all_ai(soil: dict, loc: str, health: float):
+    """Run every AI task concurrently through call_groq_batch() and store the results in session state"""
+    _log_user_action('AI_ALL_REQUESTED', {'location': loc, 'health_score': health, 'tasks': list(_AI_KEYS)})
+    soil_items = tuple(sorted(soil.items()))
+    prompts = {task: _prompt_and_key(soil_items, task, loc)[0] for task in _AI_KEYS}
+    soil_hash = hashlib.blake2b(repr(soil_items).encode(), digest_size=16).hexdigest()
+    with st.spinner("🧠 Generating all insights..."):
+        results = call_groq_batch(soil_hash, prompts)
+    for task, result in results.items():
+        st.session_state[task] = result
+    summary = results.get("summary", "")
+    if summary and not summary.startswith("⚠️"):
+        save_record(soil, summary, loc)
+    _log_user_action('AI_ALL_COMPLETED', {task: len(result) for task, result in results.items()})
 
 # Enhanced Dark Mode CSS
-st.markdown("""
+# Plain module-level constant: no formatting work on reruns
+_STYLES = """
 <style>
 /* Import Google Fonts */
 @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
@@ -127,6 +297,21 @@ header {visibility: hidden;}
     overflow: hidden;
 }
 
+/* Parameter progress bar; width comes from the --pct custom property */
+.pbar {
+    height: 100%;
+    border-radius: 2px;
+    transition: width 0.5s ease;
+    width: calc(var(--pct, 0) * 1%);
+}
+
+/* Row of cards emitted as one element */
+.card-row {
+    display: grid;
+    gap: 1rem;
+    margin-bottom: 1rem;
+}
+
 .metric-card::before {
     content: '';
     position: absolute;
@@ -417,7 +602,10 @@ hr {
     box-shadow: 0 8px 32px rgba(0, 0, 0, 0.2);
 }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Re-emitted on every rerun: Streamlit drops elements a rerun does not draw
+st.markdown(_STYLES, unsafe_allow_html=True)
 
 # Enhanced Header with Dark Theme
 environment_indicator = "🌐 PROD" if is_production_environment() else "🔧 DEV"
@@ -434,6 +622,67 @@ st.markdown(f'''
 </div>
 ''', unsafe_allow_html=True)
 
+# Sidebar AI model choices: (label, Groq model ID, description)
+_MODELS = (
+    ("🦙 Llama 3.3 70B", "llama-3.3-70b-versatile", "Best quality, slower"),
+    ("⚡ Llama 3.1 8B (Fast)", "llama-3.1-8b-instant", "Fast responses"),
+    ("🔥 Mixtral 8x7B", "mixtral-8x7b-32768", "Balanced performance"),
+    ("💎 Gemma 2 9B", "gemma2-9b-it", "Efficient and accurate")
+)
+_MODEL_LABELS = tuple(label for label, _model_id, _info in _MODELS)
+
+# Static sidebar status blocks
+_HTML_AI_ONLINE = """
+<div style="background: rgba(16, 185, 129, 0.1); border: 1px solid rgba(16, 185, 129, 0.2); 
+            padding: 0.5rem; border-radius: 8px; margin: 0.5rem 0;">
+    <span style="color: #10b981;">✅ AI Engine: Online</span>
+</div>
+"""
+_HTML_AI_OFFLINE = """
+<div style="background: rgba(245, 158, 11, 0.1); border: 1px solid rgba(245, 158, 11, 0.2); 
+            padding: 0.5rem; border-radius: 8px; margin: 0.5rem 0;">
+    <span style="color: #f59e0b;">⚠️ AI Engine: Configure API</span>
+</div>
+"""
+_HTML_DB_CONNECTED = """
+<div style="background: rgba(16, 185, 129, 0.1); border: 1px solid rgba(16, 185, 129, 0.2); 
+            padding: 0.5rem; border-radius: 8px; margin: 0.5rem 0;">
+    <span style="color: #10b981;">✅ Database: Connected</span>
+</div>
+"""
+_HTML_DB_ERROR = """
+<div style="background: rgba(239, 68, 68, 0.1); border: 1px solid rgba(239, 68, 68, 0.2); 
+            padding: 0.5rem; border-radius: 8px; margin: 0.5rem 0;">
+    <span style="color: #ef4444;">❌ Database: Error</span>
+</div>
+"""
+
+# Welcome screen feature showcase (four cards in one element)
+_HTML_FEATURE_CARDS = """
+<div class="card-row" style="grid-template-columns: repeat(4, 1fr);">
+    <div class="metric-card" style="text-align: center;">
+        <div style="font-size: 2rem; margin-bottom: 0.5rem;">🧪</div>
+        <h4>Chemistry Analysis</h4>
+        <p style="color: #94a3b8; font-size: 0.9rem;">pH, EC, NPK levels</p>
+    </div>
+    <div class="metric-card" style="text-align: center;">
+        <div style="font-size: 2rem; margin-bottom: 0.5rem;">💧</div>
+        <h4>Physical Properties</h4>
+        <p style="color: #94a3b8; font-size: 0.9rem;">Moisture & temperature</p>
+    </div>
+    <div class="metric-card" style="text-align: center;">
+        <div style="font-size: 2rem; margin-bottom: 0.5rem;">🦠</div>
+        <h4>Biological Activity</h4>
+        <p style="color: #94a3b8; font-size: 0.9rem;">Microbial health index</p>
+    </div>
+    <div class="metric-card" style="text-align: center;">
+        <div style="font-size: 2rem; margin-bottom: 0.5rem;">🤖</div>
+        <h4>AI Insights</h4>
+        <p style="color: #94a3b8; font-size: 0.9rem;">Smart crop & fertilizer advice</p>
+    </div>
+</div>
+"""
+
 # Enhanced Sidebar
 with st.sidebar:
     st.markdown("### ⚙️ System Status")
@@ -442,64 +691,34 @@ with st.sidebar:
     client_status = get_groq_client()
     db_status = init_db()
     
-    if client_status:
-        st.markdown("""
-        <div style="background: rgba(16, 185, 129, 0.1); border: 1px solid rgba(16, 185, 129, 0.2); 
-                    padding: 0.5rem; border-radius: 8px; margin: 0.5rem 0;">
-            <span style="color: #10b981;">✅ AI Engine: Online</span>
-        </div>
-        """, unsafe_allow_html=True)
-    else:
-        st.markdown("""
-        <div style="background: rgba(245, 158, 11, 0.1); border: 1px solid rgba(245, 158, 11, 0.2); 
-                    padding: 0.5rem; border-radius: 8px; margin: 0.5rem 0;">
-            <span style="color: #f59e0b;">⚠️ AI Engine: Configure API</span>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    if db_status:
-        st.markdown("""
-        <div style="background: rgba(16, 185, 129, 0.1); border: 1px solid rgba(16, 185, 129, 0.2); 
-                    padding: 0.5rem; border-radius: 8px; margin: 0.5rem 0;">
-            <span style="color: #10b981;">✅ Database: Connected</span>
-        </div>
-        """, unsafe_allow_html=True)
-    else:
-        st.markdown("""
-        <div style="background: rgba(239, 68, 68, 0.1); border: 1px solid rgba(239, 68, 68, 0.2); 
-                    padding: 0.5rem; border-radius: 8px; margin: 0.5rem 0;">
-            <span style="color: #ef4444;">❌ Database: Error</span>
-        </div>
-        """, unsafe_allow_html=True)
+    st.markdown(
+        (_HTML_AI_ONLINE if client_status else _HTML_AI_OFFLINE)
+        + (_HTML_DB_CONNECTED if db_status else _HTML_DB_ERROR),
+        unsafe_allow_html=True
+    )
     
     st.markdown("---")
     
     st.markdown("### 🤖 AI Model Selection")
-    models = {
-        "🦙 Llama 3.3 70B": "llama-3.3-70b-versatile",
-        "⚡ Llama 3.1 8B (Fast)": "llama-3.1-8b-instant", 
-        "🔥 Mixtral 8x7B": "mixtral-8x7b-32768",
-        "💎 Gemma 2 9B": "gemma2-9b-it"
-    }
-    selected = st.selectbox("Choose AI Model", list(models.keys()), index=0)
-    st.session_state.selected_model = models[selected]
+    selected = st.selectbox("Choose AI Model", _MODEL_LABELS, index=0)
+    _label, model_id, model_info = _MODELS[_MODEL_LABELS.index(selected)]
+    st.session_state.selected_model = model_id
     
     # Model info
-    model_info = {
-        "🦙 Llama 3.3 70B": "Best quality, slower",
-        "⚡ Llama 3.1 8B (Fast)": "Fast responses",
-        "🔥 Mixtral 8x7B": "Balanced performance",
-        "💎 Gemma 2 9B": "Efficient and accurate"
-    }
-    st.caption(f"ℹ️ {model_info[selected]}")
+    st.caption(f"ℹ️ {model_info}")
     
     st.markdown("---")
     
 # Tabs
-tab1, tab2, tab3 = st.tabs(["📊 Dashboard", "➕ Input", "📚 Guide"])
+# A radio rather than st.tabs: st.tabs executes every tab's body on every
+# rerun, while only the selected view runs here
+_VIEW_DASHBOARD, _VIEW_INPUT, _VIEW_GUIDE = _VIEWS = ("📊 Dashboard", "➕ Input", "📚 Guide")
+active_view = st.radio("View", _VIEWS, key="active_tab", horizontal=True, label_visibility="collapsed")
 
-with tab1:
-    if not st.session_state.soil_data:
+if active_view == _VIEW_DASHBOARD:
+    soil = st.session_state.soil_data
+    
+    if not soil:
         # Welcome screen with enhanced styling
         st.markdown("""
         <div style="text-align: center; padding: 3rem 1rem;">
@@ -512,55 +731,16 @@ with tab1:
         """, unsafe_allow_html=True)
         
         # Feature showcase
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.markdown("""
-            <div class="metric-card" style="text-align: center;">
-                <div style="font-size: 2rem; margin-bottom: 0.5rem;">🧪</div>
-                <h4>Chemistry Analysis</h4>
-                <p style="color: #94a3b8; font-size: 0.9rem;">pH, EC, NPK levels</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
-            <div class="metric-card" style="text-align: center;">
-                <div style="font-size: 2rem; margin-bottom: 0.5rem;">💧</div>
-                <h4>Physical Properties</h4>
-                <p style="color: #94a3b8; font-size: 0.9rem;">Moisture & temperature</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            st.markdown("""
-            <div class="metric-card" style="text-align: center;">
-                <div style="font-size: 2rem; margin-bottom: 0.5rem;">🦠</div>
-                <h4>Biological Activity</h4>
-                <p style="color: #94a3b8; font-size: 0.9rem;">Microbial health index</p>
-            </div>
-            """, unsafe_allow_html=True)
-        
-        with col4:
-            st.markdown("""
-            <div class="metric-card" style="text-align: center;">
-                <div style="font-size: 2rem; margin-bottom: 0.5rem;">🤖</div>
-                <h4>AI Insights</h4>
-                <p style="color: #94a3b8; font-size: 0.9rem;">Smart crop & fertilizer advice</p>
-            </div>
-            """, unsafe_allow_html=True)
+        st.markdown(_HTML_FEATURE_CARDS, unsafe_allow_html=True)
         
     else:
-        soil = st.session_state.soil_data
         loc = st.session_state.location
 
         # Parameter configuration reused across metrics and analysis
-        params = {
-            'pH': (soil['pH'], 'pH'), 'EC': (soil['EC'], 'dS/m'),
-            'Moisture': (soil['Moisture'], '%'), 'Nitrogen': (soil['Nitrogen'], 'mg/kg'),
-            'Phosphorus': (soil['Phosphorus'], 'mg/kg'), 'Potassium': (soil['Potassium'], 'mg/kg'),
-            'Microbial': (soil['Microbial'], 'Index'), 'Temperature': (soil['Temperature'], '°C')
-        }
+        params = dict(zip(_KEYS, zip(_GET_VALUES(soil), _UNITS)))
+        
+        # Interpret each parameter once; reused by the overview and the analysis cards
+        interpreted = {name: interpret(name, val) for name, (val, _unit) in params.items()}
         
         # Enhanced overview section
         st.markdown(f"""
@@ -570,107 +750,80 @@ with tab1:
         </div>
         """, unsafe_allow_html=True)
         
-        health = get_health_score(soil)
+        health = _health(tuple(sorted(soil.items())))
 
-        # Enhanced metrics row
-        col1, col2, col3 = st.columns(3)
+        # Enhanced metrics row (one element, three cards)
+        health_color = "#10b981" if health >= 70 else "#f59e0b" if health >= 50 else "#ef4444"
+        health_status = "Excellent" if health >= 70 else "Good" if health >= 50 else "Needs Attention"
         
-        with col1:
-            health_color = "#10b981" if health >= 70 else "#f59e0b" if health >= 50 else "#ef4444"
-            health_status = "Excellent" if health >= 70 else "Good" if health >= 50 else "Needs Attention"
-            st.markdown(f"""
+        # Count how many parameters are currently in the optimal range
+        optimal_count = sum(1 for status, _emoji in interpreted.values() if status == "Optimal")
+        
+        st.markdown(f"""
+        <div class="card-row" style="grid-template-columns: repeat(3, 1fr);">
             <div class="metric-card" style="text-align: center;">
                 <div style="font-size: 2.5rem; color: {health_color}; margin-bottom: 0.5rem;">{health:.0f}</div>
                 <h4>Health Score</h4>
                 <p style="color: {health_color}; font-weight: 500;">{health_status}</p>
                 <div style="background: {health_color}; height: 4px; border-radius: 2px; margin-top: 1rem; width: {health}%;"></div>
             </div>
-            """, unsafe_allow_html=True)
-        
-        with col2:
-            st.markdown("""
             <div class="metric-card" style="text-align: center;">
                 <div style="font-size: 2.5rem; color: #60a5fa; margin-bottom: 0.5rem;">8</div>
                 <h4>Parameters Tracked</h4>
                 <p style="color: #10b981; font-weight: 500;">All Systems Active</p>
                 <div style="background: #10b981; height: 4px; border-radius: 2px; margin-top: 1rem;"></div>
             </div>
-            """, unsafe_allow_html=True)
-        
-        with col3:
-            # Count how many parameters are currently in the optimal range
-            optimal_count = 0
-            for name, (val, _unit) in params.items():
-                status, _emoji = interpret(name, val)
-                if status == "Optimal":
-                    optimal_count += 1
-
-            st.markdown(f"""
             <div class="metric-card" style="text-align: center;">
                 <div style="font-size: 2.5rem; color: #60a5fa; margin-bottom: 0.5rem;">{optimal_count}</div>
                 <h4>Optimal Parameters</h4>
                 <p style="color: #10b981; font-weight: 500;">Out of {len(params)} tracked</p>
                 <div style="background: #60a5fa; height: 4px; border-radius: 2px; margin-top: 1rem; width: {100 * (optimal_count / len(params)) if len(params) else 0}%;"></div>
             </div>
-            """, unsafe_allow_html=True)
+        </div>
+        """, unsafe_allow_html=True)
         
         st.markdown("---")
         
         st.markdown("### 🔬 Parameter Analysis")
 
-        for name, (val, unit) in params.items():
-            status, emoji = interpret(name, val)
-            css = "status-good" if "🟢" in emoji or "💚" in emoji else ("status-warning" if "🟡" in emoji else "status-critical")
-            # Enhanced parameter display with progress bars
-            progress_val = min(val / {"pH": 14, "EC": 4, "Moisture": 100, "Nitrogen": 100, "Phosphorus": 100, "Potassium": 300, "Microbial": 10, "Temperature": 50}[name], 1.0)
+        # All parameter cards are joined and emitted as a single element
+        # Progress bar widths in percent, in _KEYS order
+        values = np.fromiter((val for val, _unit in params.values()), dtype=np.float64, count=len(_KEYS))
+        progress = (np.minimum(values / _RANGE_ARR, 1.0) * 100).tolist()
+        
+        html_parts = []
+        for i, (name, (val, unit)) in enumerate(params.items()):
+            status, emoji = interpreted[name]
+            css, color = _STATUS_STYLE.get(emoji, _CRITICAL_STYLE)
             
-            st.markdown(f'''
+            # Enhanced parameter display with progress bars
+            html_parts.append(f'''
             <div class="{css}">
                 <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.5rem;">
                     <div><strong>{emoji} {name}:</strong> {val:.1f} {unit}</div>
                     <div style="color: #94a3b8; font-size: 0.9rem;">{status}</div>
                 </div>
                 <div style="background: rgba(255,255,255,0.1); height: 4px; border-radius: 2px;">
-                    <div style="background: {"#10b981" if "🟢" in emoji or "💚" in emoji else "#f59e0b" if "🟡" in emoji else "#ef4444"}; 
-                                height: 100%; width: {progress_val*100:.0f}%; border-radius: 2px; transition: width 0.5s ease;"></div>
+                    <div class="pbar" style="--pct: {progress[i]:.0f}; background: {color};"></div>
                 </div>
             </div>
-            ''', unsafe_allow_html=True)
+            ''')
+        
+        st.markdown("".join(html_parts), unsafe_allow_html=True)
         
         st.markdown("---")
         
         st.markdown("### 🤖 AI-Powered Insights")
         
         # Enhanced AI buttons in a more compact layout
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            if st.button("✨ Health Summary", width='stretch', type="primary"):
-                log_user_action('AI_SUMMARY_REQUESTED', {'location': loc, 'health_score': health})
-                with st.spinner("🧠 AI is analyzing your soil..."):
-                    prompt = build_prompt(soil, "summary", loc)
-                    result = call_groq(hashlib.md5(prompt.encode()).hexdigest(), prompt, "summary")
-                    st.session_state.summary = result
-                    save_record(soil, result, loc)
-                    log_user_action('AI_SUMMARY_COMPLETED', {'result_length': len(result)})
-        
-        with col2:
-            if st.button("🌾 Crop Recommendations", width='stretch'):
-                log_user_action('AI_CROPS_REQUESTED', {'location': loc, 'health_score': health})
-                with st.spinner("🌱 Finding optimal crops..."):
-                    prompt = build_prompt(soil, "crops", loc)
-                    result = call_groq(hashlib.md5(prompt.encode()).hexdigest(), prompt, "crops")
-                    st.session_state.crops = result
-                    log_user_action('AI_CROPS_COMPLETED', {'result_length': len(result)})
+        for col, (task, label, spinner_text, primary) in zip(st.columns(3), _AI_TASKS):
+            with col:
+                if st.button(label, width='stretch', type="primary" if primary else "secondary"):
+                    _run_ai(task, spinner_text, soil, loc, health)
         
-        with col3:
-            if st.button("💊 Fertilizer Plan", width='stretch'):
-                log_user_action('AI_FERTILIZER_REQUESTED', {'location': loc, 'health_score': health})
-                with st.spinner("🧪 Calculating nutrients..."):
-                    prompt = build_prompt(soil, "fertilizer", loc)
-                    result = call_groq(hashlib.md5(prompt.encode()).hexdigest(), prompt, "fertilizer")
-                    st.session_state.fertilizer = result
-                    log_user_action('AI_FERTILIZER_COMPLETED', {'result_length': len(result)})
+        # All three insights in parallel requests rather than one button at a time
+        if st.button("⚡ Generate All Insights", width='stretch'):
+            _run_all_ai(soil, loc, health)
         
         # Display AI recommendations in a better layout
         if 'summary' in st.session_state and st.session_state.summary:
@@ -691,7 +844,56 @@ with tab1:
                     st.markdown("#### 💊 Fertilizer Plan")
                     st.info(st.session_state.fertilizer)
 
-with tab2:
+# Post-submit metric labels and value templates
+_SUBMIT_METRIC_LABELS = ("Health Score", "pH Status", "Parameters")
+_fmt_health = "{:.0f}/100".format
+_fmt_status = "{} {}".format
+_PARAMS_TRACKED = f"{len(_KEYS)} tracked"
+
+# Form error message templates
+_VAL_ERR_TMPL = "❌ Validation Error: {}".format
+_UNEXPECTED_ERR_TMPL = "❌ Unexpected Error: {}".format
+
+# Input tab help content
+_SOIL_TESTING_PRO_MD = """
+**🏢 Professional Lab Testing** (Recommended)
+- Contact local agricultural extension office
+- Use certified soil testing laboratories
+- Most accurate and comprehensive results
+- Usually costs $15-50 per test
+
+**📱 Digital Soil Meters**
+- pH meters, EC meters, moisture sensors
+- Good for regular monitoring
+- Calibrate regularly for accuracy
+- Investment: $50-200
+"""
+_SOIL_TESTING_HOME_MD = """
+**🏠 Home Test Kits**
+- Available at garden centers
+- Less accurate but affordable
+- Good for general assessment
+- Cost: $10-30
+
+**📊 Typical Testing Schedule**
+- Spring: Before planting season
+- Fall: After harvest
+- Every 2-3 years: Comprehensive analysis
+- Monthly: Basic pH and moisture
+"""
+_PARAM_TABLE_MD = """
+| Parameter | Low | Optimal | High | Critical Actions |
+|-----------|-----|---------|------|------------------|
+| **pH** | <5.5 | 6.5-7.5 | >8.5 | Add lime (low) or sulfur (high) |
+| **EC (dS/m)** | <0.4 | 0.4-0.8 | >2.0 | Improve drainage, leaching |
+| **Moisture (%)** | <15 | 25-40 | >60 | Irrigation or drainage needed |
+| **Nitrogen (mg/kg)** | <40 | 40-80 | >120 | Adjust fertilizer application |
+| **Phosphorus (mg/kg)** | <20 | 20-50 | >80 | Monitor for runoff risk |
+| **Potassium (mg/kg)** | <100 | 100-250 | >350 | Balance with other nutrients |
+| **Microbial Index** | <3 | 5-7 | >8 | Add organic matter if low |
+"""
+
+if active_view == _VIEW_INPUT:
     st.markdown("### ➕ Enter Soil Test Results")
     st.markdown("Input your laboratory soil analysis data for AI-powered insights")
     
@@ -706,67 +908,23 @@ with tab2:
     
     st.markdown("---")
     
-    with st.form("soil_form"):
+    with st.form("soil_form", clear_on_submit=False):
         st.markdown("#### 🧪 Soil Parameters")
         
-        col1, col2 = st.columns(2)
-        
-        # Use sample data if available
-        sample = st.session_state.get('sample_data', {})
+        # Use sample data if available, falling back to the field defaults
+        sample = {**_FORM_DEFAULTS, **(st.session_state.get('sample_data') or {})}
         
-        with col1:
-            st.markdown("**🔬 Chemical Properties**")
-            
-            pH = st.number_input(
-                "pH Level", 
-                min_value=0.0, max_value=14.0, value=sample.get('pH', 7.0), step=0.1,
-                help="Soil acidity/alkalinity. Optimal range: 6.5-7.5"
-            )
-            
-            EC = st.number_input(
-                "Electrical Conductivity (dS/m)", 
-                min_value=0.0, max_value=20.0, value=sample.get('EC', 2.0), step=0.1,
-                help="Soil salinity indicator. <2.0 dS/m is ideal for most crops"
-            )
-            
-            N = st.number_input(
-                "Available Nitrogen (mg/kg)", 
-                min_value=0.0, max_value=500.0, value=sample.get('Nitrogen', 50.0), step=1.0,
-                help="Essential for plant growth. Optimal: 40-80 mg/kg"
-            )
-            
-            P = st.number_input(
-                "Available Phosphorus (mg/kg)", 
-                min_value=0.0, max_value=200.0, value=sample.get('Phosphorus', 30.0), step=1.0,
-                help="Important for root development. Optimal: 20-50 mg/kg"
-            )
-        
-        with col2:
-            st.markdown("**🌡️ Physical & Biological Properties**")
-            
-            Moist = st.number_input(
-                "Moisture Content (%)", 
-                min_value=0.0, max_value=100.0, value=sample.get('Moisture', 25.0), step=1.0,
-                help="Current soil water content. Optimal: 25-40%"
-            )
-            
-            Temp = st.number_input(
-                "Soil Temperature (°C)", 
-                min_value=0.0, max_value=50.0, value=sample.get('Temperature', 25.0), step=0.5,
-                help="Current soil temperature affects microbial activity"
-            )
-            
-            K = st.number_input(
-                "Available Potassium (mg/kg)", 
-                min_value=0.0, max_value=500.0, value=sample.get('Potassium', 150.0), step=1.0,
-                help="Essential for disease resistance. Optimal: 100-250 mg/kg"
-            )
-            
-            Micro = st.number_input(
-                "Microbial Activity Index", 
-                min_value=0.0, max_value=10.0, value=sample.get('Microbial', 5.0), step=0.1,
-                help="Biological activity level (0-10 scale). Higher is better"
-            )
+        form_values = {}
+        for col, (heading, fields) in zip(st.columns(2), _FORM_COLUMNS):
+            with col:
+                st.markdown(heading)
+                
+                for key, label, low, high, _default, step, help_text in fields:
+                    form_values[key] = st.number_input(
+                        label,
+                        min_value=low, max_value=high, value=sample[key], step=step,
+                        help=help_text
+                    )
         
         st.markdown("---")
         
@@ -780,45 +938,28 @@ with tab2:
             )
         
         if submitted:
+            soil_dict = None  # set once the inputs are collected; read by the error handlers
             try:
-                log_user_action('SOIL_DATA_FORM_SUBMITTED', {'location': loc_input})
+                _log_user_action('SOIL_DATA_FORM_SUBMITTED', {'location': loc_input})
                 
                 # Validate all inputs are present and numeric
-                input_values = {
-                    "pH": pH, "EC": EC, "Moisture": Moist, "Nitrogen": N, 
-                    "Phosphorus": P, "Potassium": K, "Microbial": Micro, "Temperature": Temp
-                }
+                input_values = {key: form_values[key] for key in _KEYS}
                 
-                # Check for None or invalid values
-                for param, value in input_values.items():
+                # Check for missing, non-numeric and out-of-range values in one pass
+                for param, low, high, message in _LIMITS:
+                    value = input_values[param]
                     if value is None:
                         raise ValueError(f"{param} cannot be empty")
                     if not isinstance(value, (int, float)):
                         raise ValueError(f"{param} must be a number")
-                    if value < 0:
+                    if value < low:
                         raise ValueError(f"{param} cannot be negative")
-                
-                # Additional range validations
-                if not (0 <= pH <= 14):
-                    raise ValueError("pH must be between 0 and 14")
-                if EC > 20:
-                    raise ValueError("EC cannot exceed 20 dS/m")
-                if Moist > 100:
-                    raise ValueError("Moisture cannot exceed 100%")
-                if N > 500:
-                    raise ValueError("Nitrogen cannot exceed 500 mg/kg")
-                if P > 200:
-                    raise ValueError("Phosphorus cannot exceed 200 mg/kg")
-                if K > 500:
-                    raise ValueError("Potassium cannot exceed 500 mg/kg")
-                if Micro > 10:
-                    raise ValueError("Microbial index cannot exceed 10")
-                if Temp > 50:
-                    raise ValueError("Temperature cannot exceed 50°C")
+                    if value > high:
+                        raise ValueError(message)
                 
                 soil_dict = input_values
                 
-                log_event('SOIL_DATA_VALIDATION_START', 'Validating soil data', soil_dict)
+                _log_event('SOIL_DATA_VALIDATION_START', 'Validating soil data', soil_dict)
                 
                 # Validate using Pydantic with additional error context
                 try:
@@ -827,7 +968,10 @@ with tab2:
                     log_error(pydantic_error, 'PYDANTIC_VALIDATION_ERROR', soil_dict)
                     raise ValueError(f"Data validation failed: {str(pydantic_error)}")
                 
-                log_event('SOIL_DATA_VALIDATION_SUCCESS', 'Soil data validation passed')
+                _log_event('SOIL_DATA_VALIDATION_SUCCESS', 'Soil data validation passed')
+                
+                # AI results only go stale when the dashboard inputs change
+                previous = (st.session_state.get('soil_data'), st.session_state.get('location'))
                 
                 # Store data with error handling
                 try:
@@ -838,14 +982,12 @@ with tab2:
                     log_error(storage_error, 'SESSION_STORAGE_ERROR', soil_dict)
                     raise ValueError("Failed to store data in session")
                 
-                # Clear previous AI results
-                cleared_keys = []
-                for key in ['summary', 'crops', 'fertilizer']:
-                    if key in st.session_state:
-                        del st.session_state[key]
-                        cleared_keys.append(key)
+                changed = previous != (soil_dict, st.session_state.location)
+                
+                # Clear previous AI results (still valid for a resubmit of the same sample)
+                cleared_keys = [key for key in _AI_KEYS if st.session_state.pop(key, _MISSING) is not _MISSING] if changed else []
                 
-                log_user_action('SOIL_DATA_SAVED', {
+                _log_user_action('SOIL_DATA_SAVED', {
                     'location': loc_input,
                     'cleared_ai_results': cleared_keys,
                     'parameters': list(soil_dict.keys())
@@ -853,7 +995,7 @@ with tab2:
                 
                 # Calculate health score with error handling
                 try:
-                    health_score = get_health_score(soil_dict)
+                    health_score = _health(tuple(sorted(soil_dict.items())))
                     if not isinstance(health_score, (int, float)) or health_score < 0 or health_score > 100:
                         log_error(ValueError(f"Invalid health score: {health_score}"), 'INVALID_HEALTH_SCORE')
                         health_score = 50.0  # Safe fallback
@@ -863,41 +1005,32 @@ with tab2:
                 
                 st.success("✅ Soil data saved and analyzed successfully!")
                 
-                # Show immediate analysis results with error handling
-                try:
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Health Score", f"{health_score:.0f}/100")
-                    with col2:
-                        ph_status, ph_icon = interpret('pH', soil_dict['pH'])
-                        st.metric("pH Status", f"{ph_icon} {ph_status}")
-                    with col3:
-                        st.metric("Parameters", "8 tracked")
-                except Exception as display_error:
-                    log_error(display_error, 'METRICS_DISPLAY_ERROR')
-                    st.warning("Analysis completed but display metrics failed")
+                # Show immediate analysis results
+                # interpret() always returns a (status, emoji) pair; guard the shape anyway
+                ph_result = _interpret_ph_fast(soil_dict['pH'])
+                ph_status, ph_icon = ph_result if isinstance(ph_result, tuple) and len(ph_result) == 2 else ("Unknown", "❓")
+                metric_values = (_fmt_health(health_score), _fmt_status(ph_icon, ph_status), _PARAMS_TRACKED)
+                for col, label, value in zip(st.columns(3), _SUBMIT_METRIC_LABELS, metric_values):
+                    col.metric(label, value)
                 
                 st.info("💡 Go to the **Dashboard** tab to view detailed analysis and AI recommendations.")
                 
-                # Trigger page refresh to update dashboard immediately
-                st.rerun()
-                
             except ValueError as e:
                 log_error(e, 'SOIL_DATA_VALIDATION_ERROR', {
-                    'form_data': soil_dict if 'soil_dict' in locals() else 'not_created',
+                    'form_data': soil_dict or 'not_created',
                     'location': loc_input,
                     'error_type': 'ValueError'
                 })
-                st.error(f"❌ Validation Error: {str(e)}")
+                st.error(_VAL_ERR_TMPL(e))
                 st.info("💡 Please check that all values are within the specified ranges")
             
             except Exception as e:
                 log_error(e, 'SOIL_DATA_FORM_ERROR', {
                     'location': loc_input,
-                    'form_data': soil_dict if 'soil_dict' in locals() else 'not_created',
+                    'form_data': soil_dict or 'not_created',
                     'error_type': type(e).__name__
                 })
-                st.error(f"❌ Unexpected Error: {str(e)}")
+                st.error(_UNEXPECTED_ERR_TMPL(e))
                 st.info("💡 Please try again or contact support if the problem persists")
                 
     # Help section
@@ -906,51 +1039,243 @@ with tab2:
     
     with st.expander("🔬 How to Obtain Soil Test Values"):
         col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown("""
-            **🏢 Professional Lab Testing** (Recommended)
-            - Contact local agricultural extension office
-            - Use certified soil testing laboratories
-            - Most accurate and comprehensive results
-            - Usually costs $15-50 per test
-            
-            **📱 Digital Soil Meters**
-            - pH meters, EC meters, moisture sensors
-            - Good for regular monitoring
-            - Calibrate regularly for accuracy
-            - Investment: $50-200
-            """)
-        
-        with col2:
-            st.markdown("""
-            **🏠 Home Test Kits**
-            - Available at garden centers
-            - Less accurate but affordable
-            - Good for general assessment
-            - Cost: $10-30
-            
-            **📊 Typical Testing Schedule**
-            - Spring: Before planting season
-            - Fall: After harvest
-            - Every 2-3 years: Comprehensive analysis
-            - Monthly: Basic pH and moisture
-            """)
+        col1.markdown(_SOIL_TESTING_PRO_MD)
+        col2.markdown(_SOIL_TESTING_HOME_MD)
     
     with st.expander("📋 Parameter Guidelines & Interpretation"):
-        st.markdown("""
-        | Parameter | Low | Optimal | High | Critical Actions |
-        |-----------|-----|---------|------|------------------|
-        | **pH** | <5.5 | 6.5-7.5 | >8.5 | Add lime (low) or sulfur (high) |
-        | **EC (dS/m)** | <0.4 | 0.4-0.8 | >2.0 | Improve drainage, leaching |
-        | **Moisture (%)** | <15 | 25-40 | >60 | Irrigation or drainage needed |
-        | **Nitrogen (mg/kg)** | <40 | 40-80 | >120 | Adjust fertilizer application |
-        | **Phosphorus (mg/kg)** | <20 | 20-50 | >80 | Monitor for runoff risk |
-        | **Potassium (mg/kg)** | <100 | 100-250 | >350 | Balance with other nutrients |
-        | **Microbial Index** | <3 | 5-7 | >8 | Add organic matter if low |
-        """)
-
-with tab3:
+        st.markdown(_PARAM_TABLE_MD)
+
+# Personalized Action Plan rules: (parameter, comparison, threshold, recommendation)
+_ACTION_RULES = (
+    ("pH", operator.lt, 6.5, "🔧 **pH Too Low:** Apply agricultural lime at 1-2 tons/hectare"),
+    ("pH", operator.gt, 7.5, "🔧 **pH Too High:** Apply sulfur at 200-500 kg/hectare"),
+    ("EC", operator.gt, 2.0, "💧 **High Salinity:** Implement leaching program with 25% extra irrigation"),
+    ("Moisture", operator.lt, 20, "💧 **Low Moisture:** Increase irrigation frequency and add mulch"),
+    ("Moisture", operator.gt, 50, "🚰 **High Moisture:** Improve drainage and reduce irrigation"),
+    ("Nitrogen", operator.lt, 40, "🌿 **Low Nitrogen:** Apply nitrogen fertilizer at 100-150 kg N/hectare"),
+    ("Phosphorus", operator.lt, 20, "🌿 **Low Phosphorus:** Apply phosphate fertilizer at 50-75 kg P₂O₅/hectare"),
+    ("Potassium", operator.lt, 100, "🌿 **Low Potassium:** Apply potash fertilizer at 75-100 kg K₂O/hectare"),
+    ("Microbial", operator.lt, 4, "🦠 **Low Biology:** Add 2-4 tons compost/hectare and reduce tillage")
+)
+
+# Column form of _ACTION_RULES, evaluated with one vectorized comparison
+_RULE_KEYS = tuple(key for key, _compare, _threshold, _message in _ACTION_RULES)
+_RULE_THRESHOLDS = np.array([threshold for _key, _compare, threshold, _message in _ACTION_RULES], dtype=np.float64)
+_RULE_IS_LOW = np.array([compare is operator.lt for _key, compare, _threshold, _message in _ACTION_RULES])
+_RULE_MESSAGES = np.array([message for _key, _compare, _threshold, message in _ACTION_RULES], dtype=object)
+_GET_RULE_VALUES = operator.itemgetter(*_RULE_KEYS)
+
+# Knowledge Base (Guide view) static content
+# *_HTML blocks go through st.html (no markdown pass); *_MD blocks through st.markdown
+_KB_CRITICAL_RANGES_HTML = """
+<div class="rec-box">
+    <h4>🚨 Critical Ranges</h4>
+    <ul>
+        <li><strong>pH:</strong> Avoid <5.0 or >9.0</li>
+        <li><strong>EC:</strong> Keep <4.0 dS/m</li>
+        <li><strong>Moisture:</strong> Prevent <10% or >80%</li>
+        <li><strong>NPK:</strong> Balance is key</li>
+    </ul>
+</div>
+"""
+_KB_OPTIMAL_TARGETS_HTML = """
+<div class="rec-box">
+    <h4>✅ Optimal Targets</h4>
+    <ul>
+        <li><strong>pH:</strong> 6.5-7.5 for most crops</li>
+        <li><strong>EC:</strong> 0.4-0.8 dS/m</li>
+        <li><strong>Moisture:</strong> 25-40%</li>
+        <li><strong>Microbial:</strong> 5-7 index</li>
+    </ul>
+</div>
+"""
+_KB_PH_GUIDE_MD = """
+**Understanding pH:**
+- **Scale:** 0-14 (7 is neutral)
+- **Optimal Range:** 6.5-7.5 for most crops
+- **Impact:** Affects nutrient availability and microbial activity
+
+**pH Levels & Effects:**
+- **<5.5 (Highly Acidic):** Aluminum toxicity, reduced nutrient uptake
+- **5.5-6.5 (Slightly Acidic):** Some crops thrive, others struggle
+- **6.5-7.5 (Optimal):** Maximum nutrient availability
+- **7.5-8.5 (Slightly Alkaline):** Iron and zinc deficiency possible
+- **>8.5 (Highly Alkaline):** Severe nutrient lockout
+
+**Correction Methods:**
+- **Too Low:** Add agricultural lime (CaCO₃)
+- **Too High:** Add sulfur or organic matter
+- **Monitoring:** Test every 6 months during correction
+"""
+_KB_PH_CROPS_MD = """
+**🌱 Crop pH Preferences:**
+- **Acidic (5.5-6.5):** Blueberries, potatoes
+- **Neutral (6.5-7.5):** Most vegetables, grains
+- **Alkaline (7.5-8.5):** Asparagus, beets
+
+**⚠️ Warning Signs:**
+- Yellowing leaves (chlorosis)
+- Poor root development
+- Stunted growth
+- Increased pest problems
+"""
+_KB_EC_GUIDE_MD = """
+**Understanding EC:**
+- **Measurement:** Electrical conductivity in dS/m
+- **Indicates:** Total dissolved salts in soil
+- **Optimal Range:** 0.4-0.8 dS/m
+
+**Salinity Levels:**
+- **0-0.8 dS/m:** Low salinity - safe for all crops
+- **0.8-2.0 dS/m:** Moderate - some sensitive crops affected
+- **2.0-4.0 dS/m:** High - only tolerant crops survive
+- **>4.0 dS/m:** Very high - severe crop damage
+
+**Management Strategies:**
+- **Leaching:** Apply excess water to flush salts
+- **Drainage:** Improve soil drainage systems
+- **Amendments:** Add gypsum for sodium-rich soils
+- **Crop Selection:** Choose salt-tolerant varieties
+"""
+_KB_EC_CROPS_MD = """
+**🧂 Salt-Tolerant Crops:**
+- **High Tolerance:** Barley, sugar beet
+- **Moderate:** Wheat, cotton, tomato
+- **Low Tolerance:** Beans, strawberries
+
+**💧 Leaching Requirements:**
+- **EC 2-4:** 15-30% extra water
+- **EC 4-8:** 30-50% extra water
+- **EC >8:** Professional remediation
+"""
+_KB_NPK_GUIDE_MD = """
+### Nitrogen (N) - The Growth Engine
+**Functions:** Protein synthesis, chlorophyll production, vegetative growth
+- **Optimal Range:** 40-80 mg/kg
+- **Deficiency Signs:** Yellowing leaves (starting from bottom), stunted growth
+- **Excess Signs:** Dark green foliage, delayed maturity, lodging
+- **Sources:** Urea (46-0-0), Ammonium sulfate (21-0-0), Compost
+
+### Phosphorus (P) - The Root Builder
+**Functions:** Root development, flowering, fruit formation, energy transfer
+- **Optimal Range:** 20-50 mg/kg
+- **Deficiency Signs:** Purple leaf tinge, poor root growth, delayed maturity
+- **Excess Signs:** Reduced zinc and iron uptake
+- **Sources:** DAP (18-46-0), SSP (0-16-0), Bone meal
+
+### Potassium (K) - The Protector
+**Functions:** Disease resistance, water regulation, enzyme activation
+- **Optimal Range:** 100-250 mg/kg
+- **Deficiency Signs:** Brown leaf edges, weak stems, poor fruit quality
+- **Excess Signs:** Reduced calcium and magnesium uptake
+- **Sources:** MOP (0-0-60), SOP (0-0-50), Wood ash
+
+### 🎯 NPK Balance Tips:
+- **Vegetative Growth:** Higher N ratio (3-1-2)
+- **Flowering/Fruiting:** Higher P and K (1-3-2)
+- **Maintenance:** Balanced ratio (1-1-1)
+"""
+_KB_MOISTURE_GUIDE_MD = """
+**Optimal Moisture Levels:**
+- **Sandy Soils:** 15-25%
+- **Loamy Soils:** 25-35%
+- **Clay Soils:** 35-45%
+
+**Moisture Stress Indicators:**
+- **Too Low (<15%):** Wilting, leaf drop, stunted growth
+- **Too High (>60%):** Root rot, fungal diseases, poor aeration
+
+**Irrigation Guidelines:**
+- **Frequency:** Deep, infrequent watering preferred
+- **Timing:** Early morning or late evening
+- **Amount:** 1-2 inches per week for most crops
+"""
+_KB_MOISTURE_TIPS_MD = """
+**💡 Water Management Tips:**
+- **Mulching:** Reduces evaporation by 50-70%
+- **Drip Irrigation:** 90% efficiency vs 60% sprinkler
+- **Soil Amendments:** Compost improves water retention
+- **Cover Crops:** Reduce soil moisture loss
+
+**🌡️ Temperature Effects:**
+- **Hot Weather:** Increase watering frequency
+- **Cool Weather:** Reduce watering, improve drainage
+- **Seasonal:** Adjust based on crop growth stage
+"""
+_KB_MICROBIAL_GUIDE_MD = """
+**Understanding Soil Biology:**
+- **Microbial Index:** 0-10 scale measuring biological activity
+- **Optimal Range:** 5-7 for healthy soil ecosystem
+- **Key Players:** Bacteria, fungi, protozoa, nematodes
+
+**Benefits of Active Soil Biology:**
+- **Nutrient Cycling:** Converts organic matter to plant-available nutrients
+- **Disease Suppression:** Beneficial microbes outcompete pathogens
+- **Soil Structure:** Fungal hyphae bind soil particles
+- **Water Retention:** Improved soil aggregation
+
+**Enhancing Microbial Activity:**
+- **Organic Matter:** Add compost, manure, crop residues
+- **Reduce Tillage:** Minimal disturbance preserves fungal networks
+- **Cover Crops:** Provide continuous root exudates
+- **Avoid Chemicals:** Reduce pesticide and synthetic fertilizer use
+- **pH Management:** Maintain optimal pH for microbial growth
+
+**🔬 Biological Indicators:**
+- **High Activity (7-10):** Rich, dark soil with earthworms
+- **Moderate Activity (4-6):** Some organic matter, limited biology
+- **Low Activity (0-3):** Compacted, lifeless soil
+"""
+_KB_TEMPERATURE_GUIDE_MD = """
+**Temperature Ranges:**
+- **Cold (<10°C):** Slow microbial activity, reduced nutrient availability
+- **Optimal (15-30°C):** Peak biological activity, good root growth
+- **Hot (>35°C):** Heat stress, increased water demand
+
+**Seasonal Management:**
+- **Spring:** Gradual warming, start fertilization
+- **Summer:** Peak activity, monitor moisture
+- **Fall:** Prepare for dormancy, reduce inputs
+- **Winter:** Minimal activity, plan improvements
+"""
+_KB_TEMPERATURE_TIPS_MD = """
+**🌡️ Temperature Tips:**
+- **Mulching:** Moderates soil temperature
+- **Shade Cloth:** Protects from extreme heat
+- **Irrigation:** Cooling effect in hot weather
+- **Timing:** Plant when soil temps are optimal
+
+**📊 Crop Temperature Preferences:**
+- **Cool Season:** 10-20°C (lettuce, peas)
+- **Warm Season:** 20-30°C (tomatoes, peppers)
+- **Hot Season:** 25-35°C (melons, okra)
+"""
+_KB_FOOTER_HTML = """
+<div style="background: rgba(59, 130, 246, 0.1); border: 1px solid rgba(59, 130, 246, 0.2); 
+            padding: 1.5rem; border-radius: 12px; text-align: center;">
+    <h4 style="color: #60a5fa; margin-bottom: 1rem;">💡 Pro Tips for Soil Health</h4>
+    <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; text-align: left;">
+        <div>
+            <strong>🔄 Regular Testing:</strong><br>
+            Test soil every 3-6 months during growing season
+        </div>
+        <div>
+            <strong>📊 Keep Records:</strong><br>
+            Track changes over time to identify trends
+        </div>
+        <div>
+            <strong>🌱 Gradual Changes:</strong><br>
+            Make small adjustments rather than drastic changes
+        </div>
+        <div>
+            <strong>🤝 Seek Advice:</strong><br>
+            Consult local extension services for region-specific guidance
+        </div>
+    </div>
+</div>
+"""
+
+if active_view == _VIEW_GUIDE:
     st.markdown("### 📚 Soil Science Knowledge Base")
     st.markdown("Comprehensive guide to understanding and optimizing soil health")
     
@@ -960,30 +1285,10 @@ with tab3:
     col1, col2 = st.columns(2)
     
     with col1:
-        st.markdown("""
-        <div class="rec-box">
-            <h4>🚨 Critical Ranges</h4>
-            <ul>
-                <li><strong>pH:</strong> Avoid <5.0 or >9.0</li>
-                <li><strong>EC:</strong> Keep <4.0 dS/m</li>
-                <li><strong>Moisture:</strong> Prevent <10% or >80%</li>
-                <li><strong>NPK:</strong> Balance is key</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        st.html(_KB_CRITICAL_RANGES_HTML)
     
     with col2:
-        st.markdown("""
-        <div class="rec-box">
-            <h4>✅ Optimal Targets</h4>
-            <ul>
-                <li><strong>pH:</strong> 6.5-7.5 for most crops</li>
-                <li><strong>EC:</strong> 0.4-0.8 dS/m</li>
-                <li><strong>Moisture:</strong> 25-40%</li>
-                <li><strong>Microbial:</strong> 5-7 index</li>
-            </ul>
-        </div>
-        """, unsafe_allow_html=True)
+        st.html(_KB_OPTIMAL_TARGETS_HTML)
     
     st.markdown("---")
     
@@ -992,238 +1297,65 @@ with tab3:
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            st.markdown("""
-            **Understanding pH:**
-            - **Scale:** 0-14 (7 is neutral)
-            - **Optimal Range:** 6.5-7.5 for most crops
-            - **Impact:** Affects nutrient availability and microbial activity
-            
-            **pH Levels & Effects:**
-            - **<5.5 (Highly Acidic):** Aluminum toxicity, reduced nutrient uptake
-            - **5.5-6.5 (Slightly Acidic):** Some crops thrive, others struggle
-            - **6.5-7.5 (Optimal):** Maximum nutrient availability
-            - **7.5-8.5 (Slightly Alkaline):** Iron and zinc deficiency possible
-            - **>8.5 (Highly Alkaline):** Severe nutrient lockout
-            
-            **Correction Methods:**
-            - **Too Low:** Add agricultural lime (CaCO₃)
-            - **Too High:** Add sulfur or organic matter
-            - **Monitoring:** Test every 6 months during correction
-            """)
+            st.markdown(_KB_PH_GUIDE_MD)
         
         with col2:
-            st.markdown("""
-            **🌱 Crop pH Preferences:**
-            - **Acidic (5.5-6.5):** Blueberries, potatoes
-            - **Neutral (6.5-7.5):** Most vegetables, grains
-            - **Alkaline (7.5-8.5):** Asparagus, beets
-            
-            **⚠️ Warning Signs:**
-            - Yellowing leaves (chlorosis)
-            - Poor root development
-            - Stunted growth
-            - Increased pest problems
-            """)
+            st.markdown(_KB_PH_CROPS_MD)
     
     with st.expander("⚡ EC - Electrical Conductivity & Salinity"):
         col1, col2 = st.columns([2, 1])
         
         with col1:
-            st.markdown("""
-            **Understanding EC:**
-            - **Measurement:** Electrical conductivity in dS/m
-            - **Indicates:** Total dissolved salts in soil
-            - **Optimal Range:** 0.4-0.8 dS/m
-            
-            **Salinity Levels:**
-            - **0-0.8 dS/m:** Low salinity - safe for all crops
-            - **0.8-2.0 dS/m:** Moderate - some sensitive crops affected
-            - **2.0-4.0 dS/m:** High - only tolerant crops survive
-            - **>4.0 dS/m:** Very high - severe crop damage
-            
-            **Management Strategies:**
-            - **Leaching:** Apply excess water to flush salts
-            - **Drainage:** Improve soil drainage systems
-            - **Amendments:** Add gypsum for sodium-rich soils
-            - **Crop Selection:** Choose salt-tolerant varieties
-            """)
+            st.markdown(_KB_EC_GUIDE_MD)
         
         with col2:
-            st.markdown("""
-            **🧂 Salt-Tolerant Crops:**
-            - **High Tolerance:** Barley, sugar beet
-            - **Moderate:** Wheat, cotton, tomato
-            - **Low Tolerance:** Beans, strawberries
-            
-            **💧 Leaching Requirements:**
-            - **EC 2-4:** 15-30% extra water
-            - **EC 4-8:** 30-50% extra water
-            - **EC >8:** Professional remediation
-            """)
+            st.markdown(_KB_EC_CROPS_MD)
     
     with st.expander("🌿 NPK - Essential Macronutrients"):
-        st.markdown("""
-        ### Nitrogen (N) - The Growth Engine
-        **Functions:** Protein synthesis, chlorophyll production, vegetative growth
-        - **Optimal Range:** 40-80 mg/kg
-        - **Deficiency Signs:** Yellowing leaves (starting from bottom), stunted growth
-        - **Excess Signs:** Dark green foliage, delayed maturity, lodging
-        - **Sources:** Urea (46-0-0), Ammonium sulfate (21-0-0), Compost
-        
-        ### Phosphorus (P) - The Root Builder
-        **Functions:** Root development, flowering, fruit formation, energy transfer
-        - **Optimal Range:** 20-50 mg/kg
-        - **Deficiency Signs:** Purple leaf tinge, poor root growth, delayed maturity
-        - **Excess Signs:** Reduced zinc and iron uptake
-        - **Sources:** DAP (18-46-0), SSP (0-16-0), Bone meal
-        
-        ### Potassium (K) - The Protector
-        **Functions:** Disease resistance, water regulation, enzyme activation
-        - **Optimal Range:** 100-250 mg/kg
-        - **Deficiency Signs:** Brown leaf edges, weak stems, poor fruit quality
-        - **Excess Signs:** Reduced calcium and magnesium uptake
-        - **Sources:** MOP (0-0-60), SOP (0-0-50), Wood ash
-        
-        ### 🎯 NPK Balance Tips:
-        - **Vegetative Growth:** Higher N ratio (3-1-2)
-        - **Flowering/Fruiting:** Higher P and K (1-3-2)
-        - **Maintenance:** Balanced ratio (1-1-1)
-        """)
+        st.markdown(_KB_NPK_GUIDE_MD)
     
     with st.expander("💧 Moisture Management"):
         col1, col2 = st.columns(2)
         
         with col1:
-            st.markdown("""
-            **Optimal Moisture Levels:**
-            - **Sandy Soils:** 15-25%
-            - **Loamy Soils:** 25-35%
-            - **Clay Soils:** 35-45%
-            
-            **Moisture Stress Indicators:**
-            - **Too Low (<15%):** Wilting, leaf drop, stunted growth
-            - **Too High (>60%):** Root rot, fungal diseases, poor aeration
-            
-            **Irrigation Guidelines:**
-            - **Frequency:** Deep, infrequent watering preferred
-            - **Timing:** Early morning or late evening
-            - **Amount:** 1-2 inches per week for most crops
-            """)
+            st.markdown(_KB_MOISTURE_GUIDE_MD)
         
         with col2:
-            st.markdown("""
-            **💡 Water Management Tips:**
-            - **Mulching:** Reduces evaporation by 50-70%
-            - **Drip Irrigation:** 90% efficiency vs 60% sprinkler
-            - **Soil Amendments:** Compost improves water retention
-            - **Cover Crops:** Reduce soil moisture loss
-            
-            **🌡️ Temperature Effects:**
-            - **Hot Weather:** Increase watering frequency
-            - **Cool Weather:** Reduce watering, improve drainage
-            - **Seasonal:** Adjust based on crop growth stage
-            """)
+            st.markdown(_KB_MOISTURE_TIPS_MD)
     
     with st.expander("🦠 Microbial Activity & Soil Biology"):
-        st.markdown("""
-        **Understanding Soil Biology:**
-        - **Microbial Index:** 0-10 scale measuring biological activity
-        - **Optimal Range:** 5-7 for healthy soil ecosystem
-        - **Key Players:** Bacteria, fungi, protozoa, nematodes
-        
-        **Benefits of Active Soil Biology:**
-        - **Nutrient Cycling:** Converts organic matter to plant-available nutrients
-        - **Disease Suppression:** Beneficial microbes outcompete pathogens
-        - **Soil Structure:** Fungal hyphae bind soil particles
-        - **Water Retention:** Improved soil aggregation
-        
-        **Enhancing Microbial Activity:**
-        - **Organic Matter:** Add compost, manure, crop residues
-        - **Reduce Tillage:** Minimal disturbance preserves fungal networks
-        - **Cover Crops:** Provide continuous root exudates
-        - **Avoid Chemicals:** Reduce pesticide and synthetic fertilizer use
-        - **pH Management:** Maintain optimal pH for microbial growth
-        
-        **🔬 Biological Indicators:**
-        - **High Activity (7-10):** Rich, dark soil with earthworms
-        - **Moderate Activity (4-6):** Some organic matter, limited biology
-        - **Low Activity (0-3):** Compacted, lifeless soil
-        """)
+        st.markdown(_KB_MICROBIAL_GUIDE_MD)
     
     with st.expander("🌡️ Temperature Effects on Soil Health"):
         col1, col2 = st.columns(2)
         
         with col1:
-            st.markdown("""
-            **Temperature Ranges:**
-            - **Cold (<10°C):** Slow microbial activity, reduced nutrient availability
-            - **Optimal (15-30°C):** Peak biological activity, good root growth
-            - **Hot (>35°C):** Heat stress, increased water demand
-            
-            **Seasonal Management:**
-            - **Spring:** Gradual warming, start fertilization
-            - **Summer:** Peak activity, monitor moisture
-            - **Fall:** Prepare for dormancy, reduce inputs
-            - **Winter:** Minimal activity, plan improvements
-            """)
+            st.markdown(_KB_TEMPERATURE_GUIDE_MD)
         
         with col2:
-            st.markdown("""
-            **🌡️ Temperature Tips:**
-            - **Mulching:** Moderates soil temperature
-            - **Shade Cloth:** Protects from extreme heat
-            - **Irrigation:** Cooling effect in hot weather
-            - **Timing:** Plant when soil temps are optimal
-            
-            **📊 Crop Temperature Preferences:**
-            - **Cool Season:** 10-20°C (lettuce, peas)
-            - **Warm Season:** 20-30°C (tomatoes, peppers)
-            - **Hot Season:** 25-35°C (melons, okra)
-            """)
+            st.markdown(_KB_TEMPERATURE_TIPS_MD)
     
     # Action plan generator
     st.markdown("---")
     st.markdown("### 🎯 Personalized Action Plan")
     
-    if st.session_state.soil_data:
-        soil = st.session_state.soil_data
-        
+    soil = st.session_state.soil_data
+    
+    if soil:
         st.markdown("**Based on your current soil data:**")
         
-        # Generate recommendations
-        recommendations = []
-        
-        # pH recommendations
-        if soil['pH'] < 6.5:
-            recommendations.append("🔧 **pH Too Low:** Apply agricultural lime at 1-2 tons/hectare")
-        elif soil['pH'] > 7.5:
-            recommendations.append("🔧 **pH Too High:** Apply sulfur at 200-500 kg/hectare")
-        
-        # EC recommendations
-        if soil['EC'] > 2.0:
-            recommendations.append("💧 **High Salinity:** Implement leaching program with 25% extra irrigation")
-        
-        # Moisture recommendations
-        if soil['Moisture'] < 20:
-            recommendations.append("💧 **Low Moisture:** Increase irrigation frequency and add mulch")
-        elif soil['Moisture'] > 50:
-            recommendations.append("🚰 **High Moisture:** Improve drainage and reduce irrigation")
-        
-        # NPK recommendations
-        if soil['Nitrogen'] < 40:
-            recommendations.append("🌿 **Low Nitrogen:** Apply nitrogen fertilizer at 100-150 kg N/hectare")
-        if soil['Phosphorus'] < 20:
-            recommendations.append("🌿 **Low Phosphorus:** Apply phosphate fertilizer at 50-75 kg P₂O₅/hectare")
-        if soil['Potassium'] < 100:
-            recommendations.append("🌿 **Low Potassium:** Apply potash fertilizer at 75-100 kg K₂O/hectare")
+        # Generate recommendations; the rendered list is kept per session until the values change
+        rule_values = _GET_RULE_VALUES(soil)
+        cached_plan = st.session_state.get('_plan_cache')
+        if cached_plan is None or cached_plan[0] != rule_values:
+            values = np.array(rule_values, dtype=np.float64)
+            hits = np.where(_RULE_IS_LOW, values < _RULE_THRESHOLDS, values > _RULE_THRESHOLDS)
+            cached_plan = (rule_values, "\n".join(f"- {rec}" for rec in _RULE_MESSAGES[hits]))
+            st.session_state._plan_cache = cached_plan
+        plan_md = cached_plan[1]
         
-        # Microbial recommendations
-        if soil['Microbial'] < 4:
-            recommendations.append("🦠 **Low Biology:** Add 2-4 tons compost/hectare and reduce tillage")
-        
-        if recommendations:
-            for rec in recommendations:
-                st.markdown(f"- {rec}")
+        if plan_md:
+            st.markdown(plan_md)
         else:
             st.success("🎉 **Excellent!** Your soil parameters are all within optimal ranges!")
     
@@ -1232,27 +1364,4 @@ with tab3:
     
     # Footer with tips
     st.markdown("---")
-    st.markdown("""
-    <div style="background: rgba(59, 130, 246, 0.1); border: 1px solid rgba(59, 130, 246, 0.2); 
-                padding: 1.5rem; border-radius: 12px; text-align: center;">
-        <h4 style="color: #60a5fa; margin-bottom: 1rem;">💡 Pro Tips for Soil Health</h4>
-        <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; text-align: left;">
-            <div>
-                <strong>🔄 Regular Testing:</strong><br>
-                Test soil every 3-6 months during growing season
-            </div>
-            <div>
-                <strong>📊 Keep Records:</strong><br>
-                Track changes over time to identify trends
-            </div>
-            <div>
-                <strong>🌱 Gradual Changes:</strong><br>
-                Make small adjustments rather than drastic changes
-            </div>
-            <div>
-                <strong>🤝 Seek Advice:</strong><br>
-                Consult local extension services for region-specific guidance
-            </div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.html(_KB_FOOTER_HTML)
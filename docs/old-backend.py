@@ -6,16 +6,28 @@ Contains all business logic, database operations, AI integrations, and utility f
 import os
 import json
 import logging
+import logging.handlers
+import queue
+import atexit
+import contextvars
 import traceback
 import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Optional, Any
-from groq import Groq
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple
 import sqlite3
 from pydantic import BaseModel, field_validator
 import hashlib
+from bisect import bisect_right
+import numpy as np
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# groq and pandas are imported where used, keeping them off the app's cold start
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Enhanced Logging Configuration - LOCAL ONLY
 def setup_logging():
@@ -45,27 +57,53 @@ def setup_logging():
     # Remove existing handlers to avoid duplicates
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+    previous_listener = getattr(logger, 'queue_listener', None)
+    if previous_listener is not None:
+        previous_listener.stop()
     
-    # Create single JSON log file path
-    log_file = os.path.join('logs', 'nutrisense_realtime.json')
+    # Single JSON Lines log file (one JSON object per line)
+    log_file = os.path.join('logs', 'nutrisense_realtime.jsonl')
     
     try:
-        # Initialize JSON log file if it doesn't exist
-        if not os.path.exists(log_file):
-            with open(log_file, 'w', encoding='utf-8') as f:
-                json.dump({"logs": [], "metadata": {"created": datetime.now().isoformat(), "version": "1.0"}}, f, indent=2)
-        
         # Create custom JSON handler
         class JSONFileHandler(logging.Handler):
-            def __init__(self, filename):
+            """Append-only JSONL handler; rotates to <file>.old after max_lines entries"""
+            
+            def __init__(self, filename, max_lines=1000, pending=None):
                 super().__init__()
                 self.filename = filename
+                self.max_lines = max_lines
+                # Queue feeding this handler; the file is flushed once it drains
+                self.pending = pending
+                
+                # Resume the line count of an existing file
+                try:
+                    with open(filename, 'r', encoding='utf-8') as f:
+                        self.line_count = sum(1 for _ in f)
+                except FileNotFoundError:
+                    self.line_count = 0
+                
+                self.fh = open(filename, 'a', encoding='utf-8')
+            
+            def _rotate(self):
+                """Keep the previous max_lines entries in <file>.old and start a new file"""
+                self.fh.close()
+                os.replace(self.filename, self.filename + '.old')
+                self.fh = open(self.filename, 'a', encoding='utf-8')
+                self.line_count = 0
+            
+            def close(self):
+                try:
+                    self.fh.close()
+                finally:
+                    super().close()
                 
             def emit(self, record):
                 try:
                     # Create log entry
                     log_entry = {
-                        "timestamp": datetime.now().isoformat(),
+                        # Stamped when the record was created, not when the listener writes it
+                        "timestamp": datetime.fromtimestamp(record.created).isoformat(),
                         "level": record.levelname,
                         "logger": record.name,
                         "function": record.funcName,
@@ -95,36 +133,30 @@ def setup_logging():
                     if record.exc_info:
                         log_entry["exception"] = self.format(record)
                     
-                    # Read current logs
-                    try:
-                        with open(self.filename, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                    except (FileNotFoundError, json.JSONDecodeError):
-                        data = {"logs": [], "metadata": {"created": datetime.now().isoformat(), "version": "1.0"}}
+                    # Rotate instead of growing without bound
+                    if self.line_count >= self.max_lines:
+                        self._rotate()
                     
-                    # Add new log entry
-                    data["logs"].append(log_entry)
-                    data["metadata"]["last_updated"] = datetime.now().isoformat()
-                    data["metadata"]["total_logs"] = len(data["logs"])
+                    # Append the entry (real-time update)
+                    self.fh.write(json.dumps(log_entry, default=str, ensure_ascii=False, separators=(",", ":")) + "\n")
+                    self.line_count += 1
                     
-                    # Keep only last 1000 logs to prevent file from growing too large
-                    if len(data["logs"]) > 1000:
-                        data["logs"] = data["logs"][-1000:]
-                        data["metadata"]["truncated"] = True
-                        data["metadata"]["truncated_at"] = datetime.now().isoformat()
-                    
-                    # Write back to file (real-time update)
-                    with open(self.filename, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=2, ensure_ascii=False)
+                    # One flush per burst of queued records
+                    if self.pending is None or self.pending.empty():
+                        self.fh.flush()
                         
                 except Exception:
                     # Silently fail if logging doesn't work
                     pass
         
-        # Add JSON handler to logger
-        json_handler = JSONFileHandler(log_file)
+        # Records are queued by the caller and written by a background listener thread,
+        # so logging never blocks a Streamlit script run on file I/O
+        log_queue = queue.SimpleQueue()
+        
+        # JSON handler
+        json_handler = JSONFileHandler(log_file, pending=log_queue)
         json_handler.setLevel(logging.DEBUG)
-        logger.addHandler(json_handler)
+        handlers = [json_handler]
         
         # Console handler for development (optional)
         if os.getenv('NUTRISENSE_DEBUG', 'false').lower() == 'true':
@@ -132,7 +164,19 @@ def setup_logging():
             console_handler.setLevel(logging.INFO)
             console_formatter = logging.Formatter('%(asctime)s | %(levelname)-8s | %(message)s')
             console_handler.setFormatter(console_formatter)
-            logger.addHandler(console_handler)
+            handlers.append(console_handler)
+        
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        logger.queue_listener = listener
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        
+        # Drain the queue, then close the file on interpreter exit
+        # (one hook, since atexit runs separately registered hooks in reverse order)
+        def shutdown_logging():
+            listener.stop()
+            json_handler.close()
+        atexit.register(shutdown_logging)
     
     except Exception:
         # If any logging setup fails, return disabled logger
@@ -143,61 +187,55 @@ def setup_logging():
 # Initialize logging - will be disabled in production
 logger = setup_logging()
 
+# Resolved once at import; the log_* helpers check this on every call
+_LOGGING_ENABLED = logger.name != 'nutrisense_disabled' and os.path.isdir('logs')
+
+# Current session's ID for log records, set by initialize_session() at the top of each script run
+_session_id_var = contextvars.ContextVar('session_id', default='unknown')
+
 def is_production_environment() -> bool:
     """Check if running in production/cloud environment"""
     return bool(os.getenv('STREAMLIT_SHARING') or os.getenv('STREAMLIT_CLOUD') or os.getenv('RAILWAY_ENVIRONMENT'))
 
 def is_logging_enabled() -> bool:
     """Check if logging is enabled (local development only)"""
-    return logger.name != 'nutrisense_disabled' and os.path.exists('logs')
+    return _LOGGING_ENABLED
 
 def log_event(event_type: str, message: str, data: Optional[Dict] = None):
     """Log application events with structured data - LOCAL ONLY"""
-    if not is_logging_enabled():
+    if not is_logging_enabled() or not logger.isEnabledFor(logging.INFO):
         return
         
     try:
-        # Create structured log message
-        log_message = f"EVENT: {event_type} | {message}"
-        if data:
-            log_message += f" | Data: {json.dumps(data, default=str)}"
-        
-        # Create extra fields for structured logging
+        # Raw values go in extra; the JSON handler serialises event_data itself
         extra_data = {
             'event_type': event_type,
             'event_message': message,
             'event_data': data,
-            'session_id': st.session_state.get('session_id', 'unknown')
+            'session_id': _session_id_var.get()
         }
         
-        # Log with extra data
-        logger.info(log_message, extra=extra_data)
+        logger.info("EVENT: %s | %s", event_type, message, extra=extra_data)
     except:
         pass  # Silently fail if logging doesn't work
 
 def log_error(error: Exception, context: str = "", additional_data: Optional[Dict] = None):
     """Log errors with full context and traceback - LOCAL ONLY"""
-    if not is_logging_enabled():
+    if not is_logging_enabled() or not logger.isEnabledFor(logging.ERROR):
         return
         
     try:
-        # Create structured error message
-        error_message = f"ERROR: {context} | {type(error).__name__}: {str(error)}"
-        if additional_data:
-            error_message += f" | Data: {json.dumps(additional_data, default=str)}"
-        
-        # Create extra fields for structured logging
+        # Raw values go in extra; the JSON handler serialises error_data itself
         extra_data = {
             'error_type': type(error).__name__,
             'error_message': str(error),
             'error_context': context,
             'error_data': additional_data,
-            'session_id': st.session_state.get('session_id', 'unknown'),
+            'session_id': _session_id_var.get(),
             'traceback': traceback.format_exc()
         }
         
-        # Log error with extra data
-        logger.error(error_message, extra=extra_data)
+        logger.error("ERROR: %s | %s: %s", context, extra_data['error_type'], extra_data['error_message'], extra=extra_data)
     except:
         pass  # Silently fail if logging doesn't work
 
@@ -249,9 +287,18 @@ def log_database_operation(operation: str, table: str, success: bool, error: str
 # Initialize session ID for tracking - LOCAL ONLY
 def initialize_session():
     """Initialize session ID for tracking - LOCAL ONLY"""
-    if 'session_id' not in st.session_state and is_logging_enabled():
-        st.session_state.session_id = hashlib.md5(f"{datetime.now().isoformat()}_{os.getpid()}".encode()).hexdigest()[:8]
-        log_system_event('SESSION_START', {'session_id': st.session_state.session_id})
+    if not is_logging_enabled():
+        return
+    
+    session_id = st.session_state.get('session_id')
+    is_new = session_id is None
+    if is_new:
+        session_id = st.session_state.session_id = hashlib.blake2b(f"{datetime.now().isoformat()}_{os.getpid()}".encode(), digest_size=4).hexdigest()
+    
+    # Reruns start on a fresh thread, so the context variable is set on every run
+    _session_id_var.set(session_id)
+    if is_new:
+        log_system_event('SESSION_START', {'session_id': session_id})
 
 # Log application startup - LOCAL ONLY
 def log_application_startup():
@@ -278,44 +325,41 @@ class SoilData(BaseModel):
     @field_validator('pH')
     @classmethod
     def pH_range(cls, v):
-        try:
-            if not 0 <= v <= 14:
-                log_error(ValueError(f'pH value {v} out of range 0-14'), 'SOIL_DATA_VALIDATION')
-                raise ValueError('pH must be 0-14')
-            log_event('VALIDATION_SUCCESS', f'pH validation passed: {v}')
-            return v
-        except Exception as e:
-            log_error(e, 'pH_VALIDATION_ERROR', {'value': v})
-            raise
+        # Failures surface as a ValidationError, which the caller logs once
+        if not 0 <= v <= 14:
+            raise ValueError('pH must be 0-14')
+        return v
+
+# Nitrogen/Phosphorus/Potassium points per mg/kg: each nutrient earns up to 10 at 80/50/250 mg/kg
+_NPK_FACTORS = (10.0 / 80.0, 10.0 / 50.0, 10.0 / 250.0)
+
+# Parameters the health score is computed from, in get_health_scores() column order
+_HEALTH_KEYS = ('pH', 'EC', 'Moisture', 'Nitrogen', 'Phosphorus', 'Potassium')
+_REQUIRED_HEALTH_PARAMS = frozenset(_HEALTH_KEYS)
 
 def get_health_score(soil: Dict) -> float:
     """Calculate soil health score with comprehensive error handling and logging"""
     try:
         log_user_action('HEALTH_SCORE_CALCULATION', {'soil_params': list(soil.keys())})
         
-        # Validate input data
-        required_params = ['pH', 'EC', 'Moisture', 'Nitrogen', 'Phosphorus', 'Potassium']
-        missing_params = [param for param in required_params if param not in soil]
+        # Inputs are SoilData-validated form values; a non-numeric one raises below and gets the fallback,
+        # and negative EC/N/P/K values are clamped to zero
+        missing_params = _REQUIRED_HEALTH_PARAMS - soil.keys()
         if missing_params:
-            log_error(ValueError(f'Missing required parameters: {missing_params}'), 'HEALTH_SCORE_MISSING_PARAMS')
+            log_error(ValueError(f'Missing required parameters: {sorted(missing_params)}'), 'HEALTH_SCORE_MISSING_PARAMS')
             return 50.0
         
-        # Validate data types and ranges
-        for param, value in soil.items():
-            if not isinstance(value, (int, float)):
-                log_error(TypeError(f'Parameter {param} must be numeric, got {type(value)}'), 'HEALTH_SCORE_TYPE_ERROR')
-                return 50.0
-            if value < 0:
-                log_error(ValueError(f'Parameter {param} cannot be negative: {value}'), 'HEALTH_SCORE_NEGATIVE_VALUE')
-                return 50.0
-        
         # Calculate components with bounds checking
-        ph = max(0, min(25, 25 - abs(soil['pH'] - 7.0) * 3.5))
-        ec = max(0, min(25, 25 - min(soil['EC'], 4.0) * 6.25))
-        moist = 20 if 25 <= soil['Moisture'] <= 40 else max(0, min(20, 20 - abs(soil['Moisture'] - 32.5) * 0.5))
-        npk = (min(soil['Nitrogen']/80*10, 10) + 
-               min(soil['Phosphorus']/50*10, 10) + 
-               min(soil['Potassium']/250*10, 10))
+        ph_val, ec_val, moisture = soil['pH'], soil['EC'], soil['Moisture']
+        # Negative concentrations count as zero rather than lowering the score
+        ec_val = max(ec_val, 0)
+        n, p, k = max(soil['Nitrogen'], 0), max(soil['Phosphorus'], 0), max(soil['Potassium'], 0)
+        n_factor, p_factor, k_factor = _NPK_FACTORS
+        
+        ph = max(0, min(25, 25 - abs(ph_val - 7.0) * 3.5))
+        ec = max(0, min(25, 25 - min(ec_val, 4.0) * 6.25))
+        moist = 20 if 25 <= moisture <= 40 else max(0, min(20, 20 - abs(moisture - 32.5) * 0.5))
+        npk = min(n * n_factor, 10.0) + min(p * p_factor, 10.0) + min(k * k_factor, 10.0)
         
         score = min(max(ph + ec + moist + npk, 0), 100)
         
@@ -329,29 +373,68 @@ def get_health_score(soil: Dict) -> float:
         log_error(e, 'HEALTH_SCORE_CALCULATION_ERROR', {'soil_data': soil})
         return 50.0  # Safe fallback
 
+def _health_values(raw: Optional[str]) -> list:
+    """One soil_data JSON payload as a get_health_scores() row; all NaN if it is missing or unreadable"""
+    try:
+        soil = json.loads(raw)
+        return [float(soil.get(k, np.nan)) for k in _HEALTH_KEYS]
+    except (TypeError, ValueError, AttributeError):
+        return [np.nan] * len(_HEALTH_KEYS)
+
+def get_health_scores(soil: np.ndarray) -> np.ndarray:
+    """Vectorized get_health_score() for an (N, 6) array of [pH, EC, Moisture, Nitrogen, Phosphorus, Potassium] rows"""
+    soil = np.asarray(soil, dtype=np.float64)
+    
+    ph = np.clip(25 - np.abs(soil[:, 0] - 7.0) * 3.5, 0, 25)
+    ec = np.clip(25 - np.clip(soil[:, 1], 0, 4.0) * 6.25, 0, 25)
+    moisture = soil[:, 2]
+    moist = np.where((moisture >= 25) & (moisture <= 40), 20.0, np.clip(20 - np.abs(moisture - 32.5) * 0.5, 0, 20))
+    npk = np.clip(soil[:, 3:6] * _NPK_FACTORS, 0, 10).sum(axis=1)
+    
+    return np.clip(ph + ec + moist + npk, 0, 100)
+
+# Contiguous bands per parameter: (low, high, status, emoji), band covers [low, high)
+_INTERPRET_TABLE = {
+    'pH': [(0,5.5,"Acidic","🔴"),(5.5,6.5,"Low","🟡"),(6.5,7.5,"Optimal","🟢"),(7.5,8.5,"High","🟡"),(8.5,15,"Alkaline","🔴")],
+    'EC': [(0,0.8,"Low","🟢"),(0.8,2,"Moderate","🟡"),(2,4,"High","🟠"),(4,25,"Very High","🔴")],
+    'Moisture': [(0,15,"Dry","🔴"),(15,25,"Low","🟡"),(25,40,"Optimal","🟢"),(40,60,"High","🟡"),(60,101,"Wet","🔴")],
+    'Nitrogen': [(0,40,"Low","🔴"),(40,80,"Optimal","🟢"),(80,501,"High","🟡")],
+    'Phosphorus': [(0,20,"Low","🔴"),(20,50,"Optimal","🟢"),(50,201,"High","🟡")],
+    'Potassium': [(0,100,"Low","🔴"),(100,250,"Optimal","🟢"),(250,501,"High","🟡")],
+    'Microbial': [(0,3,"Poor","🔴"),(3,7,"Good","🟢"),(7,11,"Excellent","💚")],
+    'Temperature': [(0,10,"Cold","🔵"),(10,30,"Optimal","🟢"),(30,51,"Hot","🔴")]
+}
+
+# Per parameter: band edges (lows plus the final high) and (status, emoji) per band, for bisect lookup
+_INTERPRET_BANDS = {
+    param: (tuple(b[0] for b in bands) + (bands[-1][1],), tuple((b[2], b[3]) for b in bands))
+    for param, bands in _INTERPRET_TABLE.items()
+}
+
+# NumPy form for interpret_vec(); the extra trailing label is the out-of-range slot
+_INTERPRET_ARRAYS = {
+    param: (np.array(edges, dtype=np.float64),
+            np.array([lbl[0] for lbl in labels] + ["Unknown"]),
+            np.array([lbl[1] for lbl in labels] + ["⚪"]))
+    for param, (edges, labels) in _INTERPRET_BANDS.items()
+}
+
 def interpret(param: str, val: float) -> tuple:
     """Interpret soil parameter with logging"""
     try:
         log_event('PARAMETER_INTERPRETATION', f'Interpreting {param}: {val}')
         
-        data = {
-            'pH': [(0,5.5,"Acidic","🔴"),(5.5,6.5,"Low","🟡"),(6.5,7.5,"Optimal","🟢"),(7.5,8.5,"High","🟡"),(8.5,15,"Alkaline","🔴")],
-            'EC': [(0,0.8,"Low","🟢"),(0.8,2,"Moderate","🟡"),(2,4,"High","🟠"),(4,25,"Very High","🔴")],
-            'Moisture': [(0,15,"Dry","🔴"),(15,25,"Low","🟡"),(25,40,"Optimal","🟢"),(40,60,"High","🟡"),(60,101,"Wet","🔴")],
-            'Nitrogen': [(0,40,"Low","🔴"),(40,80,"Optimal","🟢"),(80,501,"High","🟡")],
-            'Phosphorus': [(0,20,"Low","🔴"),(20,50,"Optimal","🟢"),(50,201,"High","🟡")],
-            'Potassium': [(0,100,"Low","🔴"),(100,250,"Optimal","🟢"),(250,501,"High","🟡")],
-            'Microbial': [(0,3,"Poor","🔴"),(3,7,"Good","🟢"),(7,11,"Excellent","💚")],
-            'Temperature': [(0,10,"Cold","🔵"),(10,30,"Optimal","🟢"),(30,51,"Hot","🔴")]
-        }
-        
-        for low, high, status, emoji in data.get(param, []):
-            if low <= val < high:
+        bands = _INTERPRET_BANDS.get(param)
+        if bands is not None:
+            edges, labels = bands
+            idx = bisect_right(edges, val) - 1
+            if 0 <= idx < len(labels):
+                status, emoji = labels[idx]
                 log_event('PARAMETER_INTERPRETED', f'{param} {val} -> {status}', {
                     'parameter': param,
                     'value': val,
                     'status': status,
-                    'range': f'{low}-{high}'
+                    'range': f'{edges[idx]}-{edges[idx + 1]}'
                 })
                 return status, emoji
         
@@ -365,9 +448,27 @@ def interpret(param: str, val: float) -> tuple:
         log_error(e, 'PARAMETER_INTERPRETATION_ERROR', {'parameter': param, 'value': val})
         return "Error", "❌"
 
-@st.cache_resource
+def interpret_vec(param: str, values: np.ndarray) -> tuple:
+    """Vectorized interpret() without logging; returns (statuses, emojis) arrays shaped like values"""
+    values = np.asarray(values, dtype=np.float64)
+    arrays = _INTERPRET_ARRAYS.get(param)
+    if arrays is None:
+        return np.full(values.shape, "Unknown"), np.full(values.shape, "⚪")
+    
+    edges, statuses, emojis = arrays
+    n = len(statuses) - 1
+    idx = np.searchsorted(edges, values, side='right') - 1
+    idx = np.where((idx >= 0) & (idx < n), idx, n)
+    return statuses[idx], emojis[idx]
+
+# Whether the soil_data_uq index exists; set by init_db() and dedupe_soil_records().
+# Without it, records keep a data_hash so the data_hash UNIQUE constraint deduplicates.
+_SOIL_DATA_UNIQUE = False
+
+@st.cache_resource(ttl=None, show_spinner=False)
 def init_db():
     """Initialize database with comprehensive logging"""
+    global _SOIL_DATA_UNIQUE
     try:
         log_system_event('DATABASE_INIT_START')
         
@@ -378,6 +479,18 @@ def init_db():
         db_path = os.path.join(db_dir, 'soil_history.db')
         conn = sqlite3.connect(db_path, check_same_thread=False)
         
+        # WAL: readers don't block the writer, and with synchronous=NORMAL a commit
+        # no longer fsyncs (only checkpoints do). Creates soil_history.db-wal and
+        # soil_history.db-shm next to the database; keep them with it when copying.
+        # Runs once per process since the connection is a cached resource.
+        conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "PRAGMA temp_store=MEMORY;"
+            "PRAGMA mmap_size=268435456;"
+            "PRAGMA cache_size=-20000;"
+        )
+        
         # Create table
         conn.execute("""
             CREATE TABLE IF NOT EXISTS soil_records (
@@ -412,11 +525,27 @@ def init_db():
             else:
                 log_error(e, 'DATABASE_ALTER_ERROR', {'column': 'location'})
         
+        # Newest-first listing in load_history() walks this index instead of sorting
+        conn.execute("CREATE INDEX IF NOT EXISTS soil_records_ts_idx ON soil_records(timestamp DESC)")
+        
+        # Deduplicate on the payload itself (data_hash is kept only for older rows)
+        try:
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS soil_data_uq ON soil_records(soil_data)")
+            _SOIL_DATA_UNIQUE = True
+        except sqlite3.IntegrityError:
+            # Identical payloads saved under different hash schemes; history is left untouched
+            # and records keep being hashed until dedupe_soil_records() is run
+            log_system_event('DATABASE_DUPLICATE_SOIL_DATA', {
+                'index': 'soil_data_uq',
+                'action': 'index skipped; run dedupe_soil_records() to merge duplicates'
+            })
+        
         conn.commit()
         
-        # Get record count for logging
-        cursor = conn.execute("SELECT COUNT(*) FROM soil_records")
-        record_count = cursor.fetchone()[0]
+        # Row count is a full-table scan; only gather it when debugging
+        record_count = None
+        if is_logging_enabled() and os.getenv('NUTRISENSE_DEBUG', 'false').lower() == 'true':
+            record_count = conn.execute("SELECT COUNT(*) FROM soil_records").fetchone()[0]
         
         log_database_operation('INIT', 'soil_records', True, record_count=record_count)
         log_system_event('DATABASE_INIT_SUCCESS', {'record_count': record_count})
@@ -427,7 +556,7 @@ def init_db():
         log_error(e, 'DATABASE_INIT_ERROR')
         return None
 
-@st.cache_resource
+@st.cache_resource(ttl=None, show_spinner=False)
 def get_groq_client():
     """Initialize Groq client with logging"""
     try:
@@ -449,7 +578,17 @@ def get_groq_client():
             log_system_event('GROQ_API_KEY_MISSING')
             return None
             
-        client = Groq(api_key=api_key)
+        import httpx
+        from groq import Groq
+        
+        # cache_resource makes this one client per process, so every session shares its
+        # keep-alive pool; retries are handled (with backoff) in call_groq only
+        client = Groq(
+            api_key=api_key,
+            timeout=30,
+            max_retries=0,
+            http_client=httpx.Client(timeout=30, limits=httpx.Limits(max_keepalive_connections=8))
+        )
         log_system_event('GROQ_CLIENT_INIT_SUCCESS')
         return client
         
@@ -457,24 +596,31 @@ def get_groq_client():
         log_error(e, 'GROQ_CLIENT_INIT_ERROR')
         return None
 
-def build_prompt(soil: Dict, task: str, loc: str = "") -> str:
-    """Build AI prompt with logging"""
-    try:
-        log_user_action('BUILD_PROMPT', {'task': task, 'location': loc, 'has_location': bool(loc)})
-        
-        base = f"""Soil Data{f' - {loc}' if loc else ''}:
+# Task instructions appended to the shared soil summary; unknown tasks get the summary alone
+_PROMPT_TASKS = {
+    "summary": "Provide: 1) Overall condition 2) Main concerns 3) Top 3 actions. Keep brief.",
+    "crops": "Suggest TOP 5 suitable crops with reasons. Include Indian varieties.",
+    "fertilizer": "Provide: NPK ratio, kg/hectare, timing, organic alternatives.",
+    "irrigation": "Provide: frequency, water amount, best timing for irrigation."
+}
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _prompt_base(soil_items: tuple, loc: str) -> str:
+    """Soil summary shared by all task prompts, memoized per (soil, location)"""
+    soil = dict(soil_items)
+    return f"""Soil Data{f' - {loc}' if loc else ''}:
 pH: {soil['pH']:.2f}, EC: {soil['EC']:.2f} dS/m, Moisture: {soil['Moisture']:.1f}%
 N: {soil['Nitrogen']:.2f}, P: {soil['Phosphorus']:.2f}, K: {soil['Potassium']:.2f} mg/kg
 Microbial: {soil['Microbial']:.2f}/10, Temp: {soil['Temperature']:.1f}°C"""
 
-        prompts = {
-            "summary": f"{base}\n\nProvide: 1) Overall condition 2) Main concerns 3) Top 3 actions. Keep brief.",
-            "crops": f"{base}\n\nSuggest TOP 5 suitable crops with reasons. Include Indian varieties.",
-            "fertilizer": f"{base}\n\nProvide: NPK ratio, kg/hectare, timing, organic alternatives.",
-            "irrigation": f"{base}\n\nProvide: frequency, water amount, best timing for irrigation."
-        }
+def build_prompt(soil: Dict, task: str, loc: str = "") -> str:
+    """Build AI prompt with logging"""
+    try:
+        log_user_action('BUILD_PROMPT', {'task': task, 'location': loc, 'has_location': bool(loc)})
         
-        prompt = prompts.get(task, base)
+        base = _prompt_base(tuple(sorted(soil.items())), loc)
+        instructions = _PROMPT_TASKS.get(task)
+        prompt = f"{base}\n\n{instructions}" if instructions else base
         log_event('PROMPT_BUILT', f'Built {task} prompt', {'prompt_length': len(prompt)})
         
         return prompt
@@ -522,8 +668,7 @@ def call_groq(_hash: str, prompt: str, _task: str) -> str:
                         {"role": "user", "content": prompt}
                     ],
                     temperature=0.3,
-                    max_tokens=600,
-                    timeout=30  # 30 second timeout
+                    max_tokens=600
                 )
                 break
             except Exception as retry_error:
@@ -533,7 +678,8 @@ def call_groq(_hash: str, prompt: str, _task: str) -> str:
                     'error': str(retry_error),
                     'attempt': attempt + 1
                 })
-                time.sleep(1)  # Brief delay before retry
+                # Exponential backoff with jitter (0.5s, 1s, ... capped at 8s) so retries don't bunch up on rate limits
+                time.sleep(min(2 ** attempt * 0.5 + random.random() * 0.25, 8))
         
         if not resp or not resp.choices or not resp.choices[0].message:
             log_error(ValueError("Invalid API response structure"), 'AI_REQUEST_INVALID_RESPONSE')
@@ -576,6 +722,37 @@ def call_groq(_hash: str, prompt: str, _task: str) -> str:
         else:
             return f"⚠️ AI service temporarily unavailable. Please try again later."
 
+def call_groq_batch(_hash: str, prompts: Dict[str, str]) -> Dict[str, str]:
+    """Run call_groq() for several {task: prompt} pairs concurrently; cached tasks return without a request"""
+    if not prompts:
+        return {}
+    
+    # Worker threads need the caller's script context for st.session_state and st.cache_data
+    ctx = get_script_run_ctx()
+    
+    def run(task: str, prompt: str) -> str:
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return call_groq(_hash, prompt, task)
+    
+    with ThreadPoolExecutor(max_workers=min(4, len(prompts))) as pool:
+        # Each task runs in its own copy of the caller's context so log records keep the session ID
+        futures = {task: pool.submit(contextvars.copy_context().run, run, task, prompt) for task, prompt in prompts.items()}
+        return {task: future.result() for task, future in futures.items()}
+
+# Single statement text so sqlite3's statement cache reuses the prepared insert
+_INSERT_SOIL = "INSERT OR IGNORE INTO soil_records (data_hash, soil_data, timestamp, summary, location, health_score) VALUES (?,?,?,?,?,?)"
+
+# Serialises writes on the shared connection so total_changes deltas belong to one transaction
+_DB_WRITE_LOCK = threading.Lock()
+
+def _record_row(soil: Dict, summary: str, loc: str, timestamp: datetime) -> tuple:
+    """Build the soil_records insert parameters for one sample"""
+    data_str = json.dumps(soil)
+    
+    # With the soil_data unique index, data_hash is left NULL and the index rejects duplicates
+    data_hash = None if _SOIL_DATA_UNIQUE else hashlib.blake2b(data_str.encode('utf-8'), digest_size=16).hexdigest()
+    return (data_hash, data_str, timestamp, summary, loc, get_health_score(soil))
+
 def save_record(soil: Dict, summary: str, loc: str = ""):
     """Save soil record with comprehensive logging"""
     try:
@@ -583,49 +760,109 @@ def save_record(soil: Dict, summary: str, loc: str = ""):
         
         conn = init_db()
         if conn:
-            data_str = json.dumps(soil)
-            hash_val = hashlib.md5(data_str.encode()).hexdigest()
-            health_score = get_health_score(soil)
+            row = _record_row(soil, summary, loc, datetime.now())
+            data_str, health_score = row[1], row[5]
             
             log_event('RECORD_PREPARED', 'Record prepared for saving', {
-                'hash': hash_val[:8],
                 'health_score': health_score,
                 'location': loc,
                 'data_size': len(data_str)
             })
             
-            conn.execute(
-                "INSERT OR IGNORE INTO soil_records (data_hash, soil_data, timestamp, summary, location, health_score) VALUES (?,?,?,?,?,?)",
-                (hash_val, data_str, datetime.now(), summary, loc, health_score)
-            )
-            conn.commit()
-            
-            # Check if record was actually inserted
-            cursor = conn.execute("SELECT id FROM soil_records WHERE data_hash = ?", (hash_val,))
-            record = cursor.fetchone()
+            # One transaction; total_changes tells whether the row was new or a duplicate
+            with _DB_WRITE_LOCK, conn:
+                before = conn.total_changes
+                cursor = conn.execute(_INSERT_SOIL, row)
+                inserted = conn.total_changes - before
             
-            if record:
+            if inserted:
                 log_database_operation('INSERT', 'soil_records', True, record_count=1)
                 log_user_action('SAVE_RECORD_SUCCESS', {
-                    'record_id': record[0],
-                    'hash': hash_val[:8],
+                    'record_id': cursor.lastrowid,
                     'health_score': health_score
                 })
             else:
-                log_database_operation('INSERT', 'soil_records', False, error="Record already exists (duplicate hash)")
+                log_database_operation('INSERT', 'soil_records', False, error="Record already exists (duplicate soil data)")
                 
     except Exception as e:
         log_error(e, 'SAVE_RECORD_ERROR', {'location': loc, 'has_summary': bool(summary)})
         log_database_operation('INSERT', 'soil_records', False, error=str(e))
 
-def load_history() -> pd.DataFrame:
+def save_records(batch: List[Tuple[Dict, str, str]]) -> int:
+    """Save several (soil, summary, location) samples in one transaction; returns the number inserted"""
+    try:
+        log_user_action('SAVE_RECORDS_START', {'batch_size': len(batch)})
+        
+        conn = init_db()
+        if conn and batch:
+            now = datetime.now()
+            rows = [_record_row(soil, summary, loc, now) for soil, summary, loc in batch]
+            
+            with _DB_WRITE_LOCK, conn:
+                before = conn.total_changes
+                conn.executemany(_INSERT_SOIL, rows)
+                inserted = conn.total_changes - before
+            
+            log_database_operation('INSERT', 'soil_records', True, record_count=inserted)
+            return inserted
+        
+    except Exception as e:
+        log_error(e, 'SAVE_RECORDS_ERROR', {'batch_size': len(batch)})
+        log_database_operation('INSERT', 'soil_records', False, error=str(e))
+    
+    return 0
+
+def dedupe_soil_records() -> int:
+    """
+    Maintenance step: delete records whose soil_data duplicates an earlier one, then add soil_data_uq
+    Run manually; init_db() never deletes history. Returns the number of rows removed.
+    """
+    global _SOIL_DATA_UNIQUE
+    try:
+        conn = init_db()
+        if conn:
+            with _DB_WRITE_LOCK, conn:
+                before = conn.total_changes
+                conn.execute("DELETE FROM soil_records WHERE id NOT IN (SELECT MIN(id) FROM soil_records GROUP BY soil_data)")
+                removed = conn.total_changes - before
+                conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS soil_data_uq ON soil_records(soil_data)")
+            _SOIL_DATA_UNIQUE = True
+            
+            log_database_operation('DEDUPE', 'soil_records', True, record_count=removed)
+            return removed
+        
+    except Exception as e:
+        log_error(e, 'DATABASE_DEDUPE_ERROR')
+        log_database_operation('DEDUPE', 'soil_records', False, error=str(e))
+    
+    return 0
+
+def load_history() -> "pd.DataFrame":
     """Load history with logging"""
+    import pandas as pd
+    
     try:
         log_user_action('LOAD_HISTORY_START')
         
         conn = init_db()
         if conn:
-            df = pd.read_sql_query("SELECT * FROM soil_records ORDER BY timestamp DESC LIMIT 30", conn)
+            # Listing columns only; soil_data and summary are fetched per record by load_record()
+            df = pd.read_sql_query(
+                "SELECT id, timestamp, location, health_score FROM soil_records ORDER BY timestamp DESC LIMIT 30",
+                conn,
+                parse_dates=['timestamp']
+            )
+            
+            # Records saved before the health_score column existed are scored in one batch
+            if not df.empty:
+                missing = df['health_score'].isna()
+                if missing.any():
+                    ids = df.loc[missing, 'id'].tolist()
+                    payloads = dict(conn.execute(
+                        f"SELECT id, soil_data FROM soil_records WHERE id IN ({','.join('?' * len(ids))})", ids
+                    ).fetchall())
+                    values = np.array([_health_values(payloads.get(i)) for i in ids], dtype=np.float64)
+                    df.loc[missing, 'health_score'] = get_health_scores(values)
             
             log_database_operation('SELECT', 'soil_records', True, record_count=len(df))
             log_user_action('LOAD_HISTORY_SUCCESS', {'record_count': len(df)})
@@ -637,3 +874,30 @@ def load_history() -> pd.DataFrame:
         log_database_operation('SELECT', 'soil_records', False, error=str(e))
         
     return pd.DataFrame()
+
+def load_record(record_id: int) -> Optional[Dict]:
+    """Load one saved record with its parsed soil data and AI summary"""
+    try:
+        conn = init_db()
+        if conn:
+            row = conn.execute(
+                "SELECT id, timestamp, location, health_score, soil_data, summary FROM soil_records WHERE id = ?",
+                (record_id,)
+            ).fetchone()
+            
+            log_database_operation('SELECT', 'soil_records', True, record_count=int(row is not None))
+            if row:
+                return {
+                    'id': row[0],
+                    'timestamp': row[1],
+                    'location': row[2],
+                    'health_score': row[3],
+                    'soil_data': json.loads(row[4]),
+                    'summary': row[5]
+                }
+            
+    except Exception as e:
+        log_error(e, 'LOAD_RECORD_ERROR', {'record_id': record_id})
+        log_database_operation('SELECT', 'soil_records', False, error=str(e))
+        
+    return None
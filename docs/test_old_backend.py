@@ -0,0 +1,82 @@
+"""
+Tests for the legacy Streamlit backend (old-backend.py)
+Needs streamlit, pandas and pydantic installed; skipped otherwise
+"""
+
+import importlib.util
+import json
+import math
+import os
+import sqlite3
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("pandas")
+
+BACKEND_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "old-backend.py")
+
+SAMPLE_SOIL = {
+    "pH": 7.0,
+    "EC": 1.5,
+    "Moisture": 30.0,
+    "Nitrogen": 60.0,
+    "Phosphorus": 35.0,
+    "Potassium": 180.0,
+    "Microbial": 5.5,
+    "Temperature": 25.0
+}
+
+
+@pytest.fixture(scope="module")
+def backend():
+    """Load old-backend.py under the module name old-app.py imports it as"""
+    spec = importlib.util.spec_from_file_location("backend", BACKEND_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def conn(backend, monkeypatch):
+    """In-memory soil_records table served through init_db()"""
+    connection = sqlite3.connect(":memory:")
+    connection.execute("""
+        CREATE TABLE soil_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_hash TEXT UNIQUE,
+            soil_data TEXT,
+            timestamp DATETIME,
+            summary TEXT,
+            location TEXT,
+            health_score REAL
+        )
+    """)
+    monkeypatch.setattr(backend, "init_db", lambda: connection)
+    yield connection
+    connection.close()
+
+
+def test_load_history_backfill_survives_corrupt_legacy_row(backend, conn):
+    """A legacy row with unreadable soil_data gets a NaN score instead of emptying the history"""
+    rows = [
+        # (soil_data, timestamp, health_score)
+        (json.dumps(SAMPLE_SOIL), "2024-01-04 10:00:00", None),   # legacy, valid JSON
+        ("{not json", "2024-01-03 10:00:00", None),                # legacy, corrupt JSON
+        (None, "2024-01-02 10:00:00", None),                       # legacy, no payload
+        (json.dumps(SAMPLE_SOIL), "2024-01-01 10:00:00", 42.0)     # already scored
+    ]
+    conn.executemany(
+        "INSERT INTO soil_records (soil_data, timestamp, location, health_score) VALUES (?, ?, 'Pune', ?)",
+        rows
+    )
+    conn.commit()
+
+    df = backend.load_history()
+
+    assert len(df) == 4
+    scores = df.set_index("id")["health_score"]
+    assert scores[1] == pytest.approx(backend.get_health_score(dict(SAMPLE_SOIL)))
+    assert math.isnan(scores[2])
+    assert math.isnan(scores[3])
+    assert scores[4] == 42.0